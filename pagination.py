@@ -1,7 +1,276 @@
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import InvalidPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class AstroListPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 100
+
+
+class AsyncListPagination(AstroListPagination):
+    """AstroListPagination for async views.
+
+    The count and the rows of the page are fetched with the async ORM,
+    the response body has the same shape as the synchronous one.
+    """
+
+    async def apaginate_queryset(self, queryset, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        paginator = Paginator(range(await queryset.acount()), page_size)
+        page_number = request.query_params.get(self.page_query_param) or 1
+        if page_number in self.last_page_strings:
+            page_number = paginator.num_pages
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message=str(exc)
+                )
+            )
+        start = (self.page.number - 1) * page_size
+        return [row async for row in queryset[start : start + page_size]]
+
+    def get_paginated_data(self, data):
+        return {
+            "count": self.page.paginator.count,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates the count of very large result sets.
+
+    A probe counts at most exact_count_threshold + 1 rows. Smaller
+    results get their exact count, bigger ones on PostgreSQL get the
+    planner estimate (pg_class.reltuples for a whole table, EXPLAIN
+    otherwise) instead of a full COUNT(*).
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        self.count_is_estimated = False
+        queryset = self.object_list.order_by()
+        probe = queryset.values("pk")[: self.exact_count_threshold + 1]
+        count = probe.count()
+        if count <= self.exact_count_threshold:
+            return count
+
+        estimate = self.estimate_count(queryset)
+        if estimate is None:
+            return queryset.count()
+        self.count_is_estimated = True
+        return max(estimate, count)
+
+    @staticmethod
+    def estimate_count(queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        if not queryset.query.where and not queryset.query.distinct:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+            if row and row[0] >= 0:
+                return int(row[0])
+        plan = json.loads(queryset.explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPagination(AstroListPagination):
+    """Page number pagination reporting whether the count is estimated"""
+
+    django_paginator_class = EstimatedCountPaginator
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "count": self.page.paginator.count,
+                "count_is_estimated": self.page.paginator.count_is_estimated,
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"]["count_is_estimated"] = {
+            "type": "boolean",
+            "example": False,
+        }
+        return response_schema
+
+
+class AstroCursorPagination(BasePagination):
+    """Keyset pagination over ordering fields ending with a unique one.
+
+    The cursor is an opaque token holding the ordering values of the
+    last (or first) row of the page, so every page is an index range
+    scan from that position: no COUNT(*) and no OFFSET.
+    """
+
+    page_size = AstroListPagination.page_size
+    page_size_query_param = "page_size"
+    max_page_size = AstroListPagination.max_page_size
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self, ordering=("-id",)):
+        self.ordering = ordering
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [field.lstrip("-") for field in self.ordering]
+        self.descending = self.ordering[0].startswith("-")
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+        descending = self.descending != reverse
+        queryset = queryset.order_by(
+            *[f"-{field}" if descending else field for field in self.fields]
+        )
+        if position is not None:
+            queryset = queryset.filter(self.after(position, descending))
+
+        page = list(queryset[: self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[: self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.next_position = self.previous_position = None
+        if page:
+            if reverse or has_more:
+                self.next_position = self.position_of(page[-1])
+            if has_more if reverse else position is not None:
+                self.previous_position = self.position_of(page[0])
+        return page
+
+    def after(self, position, descending):
+        """Rows strictly after the position in the given direction"""
+        lookup = "lt" if descending else "gt"
+        return reduce(
+            or_,
+            (
+                Q(
+                    **dict(zip(self.fields[:index], position[:index])),
+                    **{f"{self.fields[index]}__{lookup}": position[index]},
+                )
+                for index in range(len(self.fields))
+            ),
+        )
+
+    def position_of(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.fields]
+        return [getattr(obj, field) for field in self.fields]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        """Return the (position, reverse) pair encoded in the cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.fields, cursor["p"], strict=True)
+            ]
+            return position, bool(cursor["r"])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps(
+            {"p": position, "r": int(reverse)},
+            default=lambda value: value.isoformat(),
+            separators=(",", ":"),
+        )
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            base64.urlsafe_b64encode(cursor.encode()).decode(),
+        )
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+
+class CursorPaginationMixin:
+    """Let list clients opt into keyset pagination with ?pagination=cursor
+
+    cursor_ordering lists the ordering fields of the keyset; the last
+    one must be unique, e.g. ("-show_time", "-id").
+    """
+
+    cursor_ordering = ("-id",)
+    pagination_mode_query_param = "pagination"
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.request is not None:
+            mode = self.request.query_params.get(
+                self.pagination_mode_query_param
+            )
+            if mode == "cursor":
+                self._paginator = AstroCursorPagination(self.cursor_ordering)
+        return super().paginator
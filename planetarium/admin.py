@@ -7,11 +7,28 @@ from planetarium.models import (
     ShowSession,
     Reservation,
     Ticket,
+    SeatHold,
+    IdempotencyKey,
+    ReservationRequest,
 )
+from pagination import EstimatedCountPaginator
 
 admin.site.register(ShowTheme)
 admin.site.register(PlanetariumDome)
 admin.site.register(AstronomyShow)
 admin.site.register(ShowSession)
-admin.site.register(Reservation)
-admin.site.register(Ticket)
+admin.site.register(SeatHold)
+admin.site.register(IdempotencyKey)
+admin.site.register(ReservationRequest)
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Ticket)
+class TicketAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,185 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.views import exception_handler
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from pagination import AsyncListPagination
+from planetarium.renderers import ORJSONRenderer
+from planetarium.views import (
+    AstronomyShowViewSet,
+    PlanetariumDomeViewSet,
+    ShowSessionViewSet,
+    ShowThemeViewSet,
+)
+
+
+class AsyncReadOnlyView(View):
+    """Serve list and retrieve of viewset_class as a native async view.
+
+    Querysets, permissions, throttles, serializers and their context
+    come from viewset_class, so both paths filter and render alike.
+    Rows are fetched with the async ORM, lists through the
+    values_serializer_class of the viewset when it has one. The JWT
+    user is loaded asynchronously and throttles run in the default
+    executor, so under ASGI the view never waits in the pool of
+    synchronous views. Django 4.2 still runs each query in a thread.
+
+    Only page number pagination is supported. The views answer 404
+    unless the ASYNC_READ_VIEWS setting is on.
+    """
+
+    viewset_class = None
+    authentication = JWTAuthentication()
+    renderer = ORJSONRenderer()
+
+    async def get(self, request, pk=None):
+        if not settings.ASYNC_READ_VIEWS:
+            raise Http404
+        request = Request(request)
+        view = self.get_viewset(request, pk)
+        try:
+            request.user = await self.authenticate(request)
+            self.check_permissions(request, view)
+            await sync_to_async(self.check_throttles, thread_sensitive=False)(
+                request, view
+            )
+            if pk is None:
+                data = await self.list(view)
+            else:
+                data = await self.retrieve(view, pk)
+        except (exceptions.APIException, Http404) as exc:
+            return self.handle_exception(exc, request, view)
+        return self.render(data)
+
+    def get_viewset(self, request, pk):
+        return self.viewset_class(
+            request=request,
+            args=(),
+            kwargs={} if pk is None else {"pk": pk},
+            action="list" if pk is None else "retrieve",
+            format_kwarg=None,
+        )
+
+    async def authenticate(self, request):
+        header = self.authentication.get_header(request)
+        if header is None:
+            return AnonymousUser()
+        raw_token = self.authentication.get_raw_token(header)
+        if raw_token is None:
+            return AnonymousUser()
+
+        token = self.authentication.get_validated_token(raw_token)
+        try:
+            user_id = token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                "Token contained no recognizable user identification"
+            )
+        user = await (
+            get_user_model()
+            .objects.filter(**{jwt_settings.USER_ID_FIELD: user_id})
+            .afirst()
+        )
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed("User not found")
+        return user
+
+    @staticmethod
+    def check_permissions(request, view):
+        for permission in view.get_permissions():
+            if not permission.has_permission(request, view):
+                if not request.user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(
+                    getattr(permission, "message", None)
+                )
+
+    @staticmethod
+    def check_throttles(request, view):
+        waits = [
+            throttle.wait()
+            for throttle in view.get_throttles()
+            if not throttle.allow_request(request, view)
+        ]
+        if waits:
+            durations = [wait for wait in waits if wait is not None]
+            raise exceptions.Throttled(max(durations, default=None))
+
+    async def list(self, view):
+        request = view.request
+        mode_param = getattr(view, "pagination_mode_query_param", None)
+        if mode_param and request.query_params.get(mode_param) == "cursor":
+            raise exceptions.ValidationError(
+                {mode_param: "Cursor pagination is not served here"}
+            )
+
+        queryset = view.filter_queryset(view.get_queryset())
+        values_serializer_class = getattr(
+            view, "values_serializer_class", None
+        )
+        if values_serializer_class is not None:
+            serializer = values_serializer_class(
+                context=view.get_serializer_context()
+            )
+            queryset = serializer.values(queryset)
+
+        paginator = AsyncListPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        if values_serializer_class is not None:
+            data = serializer.to_representation(page)
+        else:
+            data = view.get_serializer(page, many=True).data
+        return paginator.get_paginated_data(data)
+
+    async def retrieve(self, view, pk):
+        queryset = view.filter_queryset(view.get_queryset())
+        try:
+            instance = await queryset.aget(pk=pk)
+        except queryset.model.DoesNotExist:
+            raise Http404
+        return view.get_serializer(instance).data
+
+    def render(self, data, status=200, headers=None):
+        return HttpResponse(
+            self.renderer.render(data),
+            status=status,
+            headers=headers,
+            content_type=self.renderer.media_type,
+        )
+
+    def handle_exception(self, exc, request, view):
+        if isinstance(
+            exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        ):
+            exc.auth_header = self.authentication.authenticate_header(request)
+        response = exception_handler(exc, {"request": request, "view": view})
+        headers = {
+            header: value
+            for header, value in response.items()
+            if header != "Content-Type"
+        }
+        return self.render(response.data, response.status_code, headers)
+
+
+class ShowThemeAsyncView(AsyncReadOnlyView):
+    viewset_class = ShowThemeViewSet
+
+
+class PlanetariumDomeAsyncView(AsyncReadOnlyView):
+    viewset_class = PlanetariumDomeViewSet
+
+
+class AstronomyShowAsyncView(AsyncReadOnlyView):
+    viewset_class = AstronomyShowViewSet
+
+
+class ShowSessionAsyncView(AsyncReadOnlyView):
+    viewset_class = ShowSessionViewSet
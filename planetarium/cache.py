@@ -0,0 +1,31 @@
+import time
+
+from django.core.cache import cache
+
+
+def model_version_key(model, namespace="version"):
+    return f"planetarium:{namespace}:{model._meta.label_lower}"
+
+
+def get_model_version(model, namespace="version"):
+    """Return the version stamp of the model data, shared by processes.
+
+    A missing stamp starts from the current time, so stamps never repeat
+    after the cache is cleared. Namespaces keep independent stamps for
+    consumers with their own invalidation rules.
+    """
+    key = model_version_key(model, namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model, namespace="version"):
+    """Invalidate everything derived from the model data"""
+    key = model_version_key(model, namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_model_version(model, namespace)
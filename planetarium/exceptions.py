@@ -0,0 +1,29 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from planetarium.models import ShowSession
+
+
+class SeatConflict(APIException):
+    """Requested seats are taken: report them and free seats around"""
+
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Some of the requested seats are already taken"
+    default_code = "seat_conflict"
+
+    def __init__(self, places):
+        super().__init__()
+        self.detail = {
+            "detail": self.default_detail,
+            "collisions": self._places_data(places),
+            "free_nearby": self._places_data(
+                ShowSession.free_places_near(places)
+            ),
+        }
+
+    @staticmethod
+    def _places_data(places):
+        return [
+            {"show_session": show_session_id, "row": row, "seat": seat}
+            for show_session_id, row, seat in places
+        ]
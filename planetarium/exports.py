@@ -0,0 +1,76 @@
+import csv
+from datetime import datetime
+
+from planetarium.renderers import ORJSONRenderer
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+EXPORT_CHUNK_SIZE = 2000
+
+TICKET_EXPORT_FIELDS = (
+    ("id", "id"),
+    ("reservation", "reservation_id"),
+    ("created_at", "reservation__created_at"),
+    ("user", "reservation__user__email"),
+    ("show_session", "show_session_id"),
+    ("show_time", "show_session__show_time"),
+    ("astronomy_show", "show_session__astronomy_show__title"),
+    ("planetarium_dome", "show_session__planetarium_dome__name"),
+    ("row", "row"),
+    ("seat", "seat"),
+)
+RESERVATION_EXPORT_FIELDS = (
+    ("id", "id"),
+    ("created_at", "created_at"),
+    ("user", "user__email"),
+    ("tickets", "tickets_count"),
+)
+
+
+class Echo:
+    """File-like object handing back what csv.writer writes"""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(names, rows):
+    render = ORJSONRenderer().render
+    for row in rows:
+        yield render(dict(zip(names, row))) + b"\n"
+
+
+def csv_lines(names, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(names).encode()
+    for row in rows:
+        yield writer.writerow(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            ]
+        ).encode()
+
+
+def export_rows(queryset, fields, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the encoded rows of the queryset chunk by chunk.
+
+    Rows come from a server-side cursor and are sent in chunks of
+    chunk_size rows, so memory does not grow with the export.
+    """
+    names = [name for name, _ in fields]
+    rows = queryset.values_list(*[lookup for _, lookup in fields]).iterator(
+        chunk_size=chunk_size
+    )
+    lines = ndjson_lines if export_format == "ndjson" else csv_lines
+
+    chunk = []
+    for line in lines(names, rows):
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
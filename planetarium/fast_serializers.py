@@ -0,0 +1,182 @@
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from planetarium.serializers import (
+    AstronomyShowListSerializer,
+    ShowSessionListSerializer,
+    TicketListSerializer,
+)
+
+SIMPLE_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.IntegerField: int,
+    serializers.ReadOnlyField: None,
+}
+
+
+def model_field(model, lookup):
+    """Return the model field at the end of a lookup path"""
+    *relations, name = lookup.split("__")
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    return model._meta.get_field(name)
+
+
+class ValuesSerializer:
+    """Render list rows straight from .values() like serializer_class does.
+
+    The fields of serializer_class are compiled once into (name, key,
+    converter) triples, so rows need no model instances and no source
+    attribute walking. Fields whose source is not a database value get
+    an entry in overrides: a lookup or an expression to select instead.
+    """
+
+    serializer_class = None
+    overrides = {}
+
+    _plan = None
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.fields = [
+            (name, key, self.bind(converter))
+            for name, key, converter in self.get_plan()
+        ]
+
+    @classmethod
+    def get_plan(cls):
+        if cls.__dict__.get("_plan") is None:
+            cls._plan = cls.compile()
+        return cls._plan
+
+    @classmethod
+    def compile(cls):
+        serializer = cls.serializer_class()
+        model = serializer.Meta.model
+        plan = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            override = cls.overrides.get(name)
+            if isinstance(override, str) or override is None:
+                key = override or field.source.replace(".", "__")
+            else:
+                key = f"_{name}"
+            plan.append((name, key, cls.converter(model, field, key)))
+        return plan
+
+    @classmethod
+    def converter(cls, model, field, key):
+        if type(field) in SIMPLE_CONVERTERS:
+            return SIMPLE_CONVERTERS[type(field)]
+        if isinstance(field, serializers.FileField):
+            try:
+                storage = model_field(model, key).storage
+            except FieldDoesNotExist:
+                raise ImproperlyConfigured(
+                    f"{cls.__name__}: {field.field_name} needs a file field"
+                )
+            use_url = getattr(
+                field, "use_url", api_settings.UPLOADED_FILES_USE_URL
+            )
+            return ("file", storage, use_url)
+        if isinstance(field, PrimaryKeyRelatedField):
+            return field.pk_field and field.pk_field.to_representation
+        if isinstance(
+            field,
+            (
+                serializers.BaseSerializer,
+                serializers.ManyRelatedField,
+                serializers.RelatedField,
+                serializers.SerializerMethodField,
+            ),
+        ):
+            raise ImproperlyConfigured(
+                f"{cls.__name__}: {field.field_name} can not be read "
+                f"from values, add it to overrides"
+            )
+        return field.to_representation
+
+    def bind(self, converter):
+        if not isinstance(converter, tuple):
+            return converter
+        _, storage, use_url = converter
+        if not use_url:
+            return lambda name: name or None
+        request = self.context.get("request")
+        if request is None:
+            return lambda name: storage.url(name) if name else None
+        return lambda name: (
+            request.build_absolute_uri(storage.url(name)) if name else None
+        )
+
+    def values(self, queryset, *extra):
+        """Return the queryset as .values() rows holding every field"""
+        expressions = {
+            f"_{name}": expression
+            for name, expression in self.overrides.items()
+            if not isinstance(expression, str)
+        }
+        lookups = dict.fromkeys(
+            [key for _, key, _ in self.fields if key not in expressions]
+            + list(extra)
+        )
+        return queryset.prefetch_related(None).values(*lookups, **expressions)
+
+    def to_representation(self, rows):
+        fields = self.fields
+        return [
+            {
+                name: (
+                    value
+                    if (value := row[key]) is None or converter is None
+                    else converter(value)
+                )
+                for name, key, converter in fields
+            }
+            for row in rows
+        ]
+
+
+class ShowSessionListValuesSerializer(ValuesSerializer):
+    serializer_class = ShowSessionListSerializer
+    overrides = {
+        "planetarium_dome_capacity": F("planetarium_dome__rows")
+        * F("planetarium_dome__seats_in_row"),
+    }
+
+
+class AstronomyShowListValuesSerializer(ValuesSerializer):
+    serializer_class = AstronomyShowListSerializer
+
+
+class TicketListValuesSerializer(ValuesSerializer):
+    serializer_class = TicketListSerializer
+    overrides = {"reservation_owner": "reservation__user__email"}
+
+
+class ValuesListMixin:
+    """Serve the list action through values_serializer_class"""
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.values_serializer_class(
+            context=self.get_serializer_context()
+        )
+        ordering = getattr(self, "cursor_ordering", ())
+        queryset = serializer.values(
+            self.filter_queryset(self.get_queryset()),
+            *[field.lstrip("-") for field in ordering],
+        )
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page)
+            )
+        return Response(serializer.to_representation(queryset))
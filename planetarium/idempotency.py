@@ -0,0 +1,83 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from planetarium.models import IdempotencyKey
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+
+
+class IdempotentCreateMixin:
+    """Replay the stored response of a create repeated with the same key.
+
+    The key row is inserted before the object is created, so a
+    concurrent duplicate waits on the unique (user, key) index and
+    replays the response of the request that committed first.
+    """
+
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > IdempotencyKey._meta.get_field("key").max_length:
+            raise ValidationError(
+                {IDEMPOTENCY_KEY_HEADER: "Idempotency key is too long"}
+            )
+
+        request_hash = self._request_hash(request)
+        stored = (
+            IdempotencyKey.objects.active()
+            .filter(user=request.user, key=key)
+            .first()
+        )
+        if stored:
+            return self._replay(stored, request_hash)
+
+        IdempotencyKey.objects.expired().filter(
+            user=request.user, key=key
+        ).delete()
+        try:
+            with transaction.atomic():
+                idempotency_key = IdempotencyKey.objects.create(
+                    key=key,
+                    user=request.user,
+                    request_hash=request_hash,
+                    expires_at=timezone.now() + settings.IDEMPOTENCY_KEY_TTL,
+                )
+                response = super().create(request, *args, **kwargs)
+                idempotency_key.response_status = response.status_code
+                idempotency_key.response_data = response.data
+                idempotency_key.save(
+                    update_fields=["response_status", "response_data"]
+                )
+        except IntegrityError:
+            stored = IdempotencyKey.objects.get(user=request.user, key=key)
+            return self._replay(stored, request_hash)
+        return response
+
+    @staticmethod
+    def _request_hash(request):
+        body = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(f"{request.path}:{body}".encode()).hexdigest()
+
+    @staticmethod
+    def _replay(stored, request_hash):
+        if stored.request_hash != request_hash:
+            return Response(
+                {
+                    IDEMPOTENCY_KEY_HEADER: "Idempotency key was already "
+                    "used for another request"
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        return Response(
+            stored.response_data,
+            status=stored.response_status,
+            headers={"Idempotent-Replayed": "true"},
+        )
@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from planetarium.renderers import ORJSONRenderer, orjson
+from planetarium.views import (
+    AstronomyShowViewSet,
+    PlanetariumDomeViewSet,
+    ShowSessionViewSet,
+    ShowThemeViewSet,
+)
+
+ENDPOINTS = (
+    ("show_theme", ShowThemeViewSet),
+    ("planetarium_dome", PlanetariumDomeViewSet),
+    ("astronomy_show", AstronomyShowViewSet),
+    ("show_session", ShowSessionViewSet),
+)
+
+
+class Command(BaseCommand):
+    """Django command that compares JSON render time of list endpoints"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if orjson is None:
+            self.stdout.write(
+                self.style.WARNING(
+                    "orjson is not installed, ORJSONRenderer falls back "
+                    "to the DRF renderer"
+                )
+            )
+        factory = APIRequestFactory()
+        user = get_user_model()(is_staff=True)
+
+        for name, viewset in ENDPOINTS:
+            request = factory.get(
+                f"/api/planetarium/{name}/",
+                {"page_size": options["page_size"]},
+            )
+            force_authenticate(request, user=user)
+            data = viewset.as_view({"get": "list"})(request).data
+
+            size = len(JSONRenderer().render(data))
+            json_ms = self.time_render(JSONRenderer(), data, options)
+            orjson_ms = self.time_render(ORJSONRenderer(), data, options)
+            self.stdout.write(
+                f"{name:<18} {len(data['results']):>4} rows {size:>9} bytes"
+                f"  json {json_ms:8.3f} ms  orjson {orjson_ms:8.3f} ms"
+                f"  x{json_ms / orjson_ms:.1f}"
+            )
+
+    @staticmethod
+    def time_render(renderer, data, options):
+        """Return the mean render time in milliseconds"""
+        start = time.perf_counter()
+        for _ in range(options["repeat"]):
+            renderer.render(data)
+        return (time.perf_counter() - start) * 1000 / options["repeat"]
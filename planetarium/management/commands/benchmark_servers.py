@@ -0,0 +1,213 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.views import (
+    AstronomyShowViewSet,
+    PlanetariumDomeViewSet,
+    ShowSessionViewSet,
+    ShowThemeViewSet,
+)
+
+ENDPOINTS = {
+    "show_theme": ("showtheme", ShowThemeViewSet),
+    "planetarium_dome": ("planetariumdome", PlanetariumDomeViewSet),
+    "astronomy_show": ("astronomyshow", AstronomyShowViewSet),
+    "show_session": ("showsession", ShowSessionViewSet),
+}
+
+
+@contextmanager
+def throttling_disabled(viewset):
+    """Let one user send every request of the run"""
+    throttle_classes = viewset.throttle_classes
+    viewset.throttle_classes = ()
+    try:
+        yield
+    finally:
+        viewset.throttle_classes = throttle_classes
+
+
+class Command(BaseCommand):
+    """Django command that load tests the WSGI and ASGI handlers.
+
+    Clients are asyncio tasks sending requests back to back straight
+    to the handlers, without sockets. The WSGI handler serves them
+    from a pool of --threads threads like a threaded WSGI server, the
+    ASGI handler from the event loop, once with the synchronous view
+    and once with its async counterpart.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoint", choices=sorted(ENDPOINTS), default="show_session"
+        )
+        parser.add_argument(
+            "--pk", type=int, help="Benchmark the detail of this object"
+        )
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=8,
+            help="Worker threads of the WSGI server",
+        )
+        parser.add_argument("--host", default=settings.ALLOWED_HOSTS[0])
+        parser.add_argument(
+            "--response-cache",
+            action="store_true",
+            help="Keep the response caches of the synchronous views",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        user = get_user_model().objects.filter(is_active=True).first()
+        if user is None:
+            raise CommandError("Create a user to authenticate requests")
+        token = str(RefreshToken.for_user(user).access_token)
+
+        basename, viewset = ENDPOINTS[options["endpoint"]]
+        suffix = "list" if options["pk"] is None else "detail"
+        args = [] if options["pk"] is None else [options["pk"]]
+        query = urlencode({"page_size": options["page_size"]})
+        sync_path = reverse(f"planetarium:{basename}-{suffix}", args=args)
+        async_path = reverse(
+            f"planetarium:async-{basename}-{suffix}", args=args
+        )
+
+        caches = settings.CACHES
+        if not options["response_cache"]:
+            caches = {
+                **caches,
+                settings.RESPONSE_CACHE_ALIAS: {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                },
+            }
+        with override_settings(
+            CACHES=caches, ASYNC_READ_VIEWS=True
+        ), throttling_disabled(viewset):
+            runs = (
+                ("wsgi sync", self.wsgi_request, sync_path),
+                ("asgi sync", self.asgi_request, sync_path),
+                ("asgi async", self.asgi_request, async_path),
+            )
+            for name, request, path in runs:
+                latencies, errors, elapsed = asyncio.run(
+                    self.run_load(request, path, query, token, options)
+                )
+                self.report(name, latencies, errors, elapsed)
+
+    async def run_load(self, request, path, query, token, options):
+        self.wsgi_handler = WSGIHandler()
+        self.asgi_handler = ASGIHandler()
+        self.executor = ThreadPoolExecutor(options["threads"])
+        latencies, errors = [], []
+        remaining = iter(range(options["requests"]))
+
+        async def client():
+            for _ in remaining:
+                start = time.perf_counter()
+                status = await request(path, query, token, options["host"])
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors.append(status)
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(client() for _ in range(options["concurrency"]))
+            )
+        finally:
+            self.executor.shutdown()
+        return latencies, errors, time.perf_counter() - start
+
+    async def wsgi_request(self, path, query, token, host):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "SERVER_NAME": host,
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_HOST": host,
+            "HTTP_AUTHORIZATION": f"Bearer {token}",
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": sys.stderr,
+            "wsgi.url_scheme": "http",
+        }
+        statuses = []
+
+        def start_response(status, headers, exc_info=None):
+            statuses.append(int(status.split(" ", 1)[0]))
+
+        def serve():
+            response = self.wsgi_handler(environ, start_response)
+            try:
+                b"".join(response)
+            finally:
+                response.close()
+
+        await asyncio.get_running_loop().run_in_executor(self.executor, serve)
+        return statuses[0]
+
+    async def asgi_request(self, path, query, token, host):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "headers": [
+                (b"host", host.encode()),
+                (b"authorization", f"Bearer {token}".encode()),
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": (host, 80),
+        }
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        statuses = []
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await asyncio.Future()
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await self.asgi_handler(scope, receive, send)
+        return statuses[0]
+
+    def report(self, name, latencies, errors, elapsed):
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        line = (
+            f"{name:<11} {len(latencies) / elapsed:9.1f} req/s"
+            f"  p50 {p50:8.2f} ms  p99 {p99:8.2f} ms"
+        )
+        if errors:
+            line += self.style.ERROR(
+                f"  {len(errors)} errors (status {errors[0]})"
+            )
+        self.stdout.write(line)
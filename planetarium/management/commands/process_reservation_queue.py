@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from planetarium.models import ReservationRequest
+
+
+class Command(BaseCommand):
+    """Django command that processes queued reservation requests"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=200)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=0.2,
+            help="Seconds to sleep when there are no pending requests",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain pending requests once and exit",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        self.stdout.write("Processing reservation queue...")
+        while True:
+            processed = 0
+            show_session_ids = set(
+                ReservationRequest.objects.pending()
+                .order_by()
+                .values_list("show_session_id", flat=True)
+            )
+            for show_session_id in show_session_ids:
+                try:
+                    processed += ReservationRequest.objects.process_pending(
+                        show_session_id, options["batch_size"]
+                    )
+                except DatabaseError as exc:
+                    self.stderr.write(
+                        f"Show session {show_session_id} failed: {exc}"
+                    )
+
+            if processed:
+                self.stdout.write(f"Processed {processed} requests")
+            elif options["once"]:
+                break
+            else:
+                time.sleep(options["poll_interval"])
+
+        self.stdout.write(self.style.SUCCESS("Reservation queue is empty"))
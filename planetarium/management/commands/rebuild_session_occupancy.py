@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from planetarium.models import ShowSession
+
+
+class Command(BaseCommand):
+    """Django command that rebuilds or checks occupancy of show sessions.
+
+    The sold tickets counter and the seat map of every show session are
+    recomputed from the tickets table. Resizing a dome does this for
+    its sessions already; the command repairs anything else.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report sessions with wrong occupancy and fail if any",
+        )
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        if not options["check"]:
+            outdated = ShowSession.rebuild_occupancy(ShowSession.objects.all())
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Rebuilt occupancy of {len(outdated)} show sessions"
+                )
+            )
+            return
+
+        with transaction.atomic():
+            outdated = list(
+                ShowSession.find_outdated_occupancy(ShowSession.objects.all())
+            )
+        for show_session in outdated:
+            self.stdout.write(
+                f"Show session {show_session.id}: "
+                f"tickets_sold={show_session.tickets_sold}, "
+                f"tickets={show_session.actual_sold}"
+            )
+        if outdated:
+            raise CommandError(
+                f"{len(outdated)} show sessions have wrong occupancy"
+            )
+        self.stdout.write(
+            self.style.SUCCESS("Occupancy of all sessions is correct")
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from planetarium.models import SeatHold
+
+
+class Command(BaseCommand):
+    """Django command that deletes expired seat holds in batches"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Handle the command"""
+        deleted = 0
+        while True:
+            expired_ids = list(
+                SeatHold.objects.expired()
+                .order_by("expires_at")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not expired_ids:
+                break
+            deleted += SeatHold.objects.filter(id__in=expired_ids).delete()[0]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Deleted {deleted} expired seat holds")
+        )
@@ -0,0 +1,36 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations import AddIndex, RunSQL
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """Create the index concurrently on PostgreSQL, as usual elsewhere.
+
+    Lets migrations that must not lock big tables on PostgreSQL still
+    run on the SQLite databases used for tests and local development.
+    """
+
+    def database_forwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, *states)
+        else:
+            AddIndex.database_forwards(self, app_label, schema_editor, *states)
+
+    def database_backwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, *states)
+        else:
+            AddIndex.database_backwards(
+                self, app_label, schema_editor, *states
+            )
+
+
+class RunSQLIfPostgres(RunSQL):
+    """Run PostgreSQL-only SQL (triggers, GIN indexes), skip it elsewhere"""
+
+    def database_forwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, *states)
+
+    def database_backwards(self, app_label, schema_editor, *states):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, *states)
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_sold_tickets(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+    Ticket = apps.get_model("planetarium", "Ticket")
+    sold = (
+        Ticket.objects.filter(show_session=OuterRef("pk"))
+        .order_by()
+        .values("show_session")
+        .annotate(sold=Count("id"))
+        .values("sold")
+    )
+    ShowSession.objects.update(tickets_sold=Coalesce(Subquery(sold), Value(0)))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        (
+            "planetarium",
+            "0010_alter_ticket_reservation_alter_ticket_show_session",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="tickets_sold",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_sold_tickets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:52
+
+from django.db import migrations, models
+
+from planetarium.seat_map import SeatMap
+
+
+def build_seat_maps(apps, schema_editor):
+    ShowSession = apps.get_model("planetarium", "ShowSession")
+    Ticket = apps.get_model("planetarium", "Ticket")
+    for show_session in ShowSession.objects.select_related(
+        "planetarium_dome"
+    ).filter(tickets_sold__gt=0):
+        show_session.seat_map = SeatMap.from_places(
+            show_session.planetarium_dome.rows,
+            show_session.planetarium_dome.seats_in_row,
+            Ticket.objects.filter(show_session=show_session).values_list(
+                "row", "seat"
+            ),
+        ).to_bytes()
+        show_session.save(update_fields=["seat_map"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0011_showsession_tickets_sold"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="seat_map",
+            field=models.BinaryField(default=b"", editable=False),
+        ),
+        migrations.RunPython(build_seat_maps, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:39
+
+from django.db import migrations, models
+
+from planetarium.migration_operations import AddIndexConcurrentlyIfPostgres
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0015_reservationrequest"),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name="showsession",
+            index=models.Index(
+                fields=["astronomy_show", "show_time"],
+                name="show_session_show_time",
+            ),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name="showsession",
+            index=models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="show_session_dome_time",
+            ),
+        ),
+    ]
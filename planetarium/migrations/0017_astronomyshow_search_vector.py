@@ -0,0 +1,57 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:44
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+import planetarium.migration_operations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A')
+    || setweight(to_tsvector('english', coalesce({row}description, '')), 'B')
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0016_showsession_show_time_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(
+                editable=False, null=True
+            ),
+        ),
+        planetarium.migration_operations.RunSQLIfPostgres(
+            sql=[
+                """
+                CREATE FUNCTION planetarium_astronomyshow_search_vector()
+                RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := %s;
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+                """
+                % SEARCH_VECTOR_SQL.format(row="NEW."),
+                """
+                CREATE TRIGGER planetarium_astronomyshow_search_vector
+                BEFORE INSERT OR UPDATE ON planetarium_astronomyshow
+                FOR EACH ROW
+                EXECUTE FUNCTION planetarium_astronomyshow_search_vector()
+                """,
+                "UPDATE planetarium_astronomyshow SET search_vector = %s"
+                % SEARCH_VECTOR_SQL.format(row=""),
+                "CREATE INDEX planetarium_astronomyshow_search_gin "
+                "ON planetarium_astronomyshow USING gin (search_vector)",
+            ],
+            reverse_sql=[
+                "DROP INDEX planetarium_astronomyshow_search_gin",
+                "DROP TRIGGER planetarium_astronomyshow_search_vector "
+                "ON planetarium_astronomyshow",
+                "DROP FUNCTION planetarium_astronomyshow_search_vector()",
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.4 on 2026-10-18 15:02
+
+from django.db import migrations
+
+INDEX_NAME = "planetarium_astronomyshow_theme_theme_show"
+
+
+def create_index(apps, schema_editor):
+    concurrently = (
+        "CONCURRENTLY "
+        if schema_editor.connection.vendor == "postgresql"
+        else ""
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {concurrently}IF NOT EXISTS {INDEX_NAME} "
+        "ON planetarium_astronomyshow_theme (showtheme_id, astronomyshow_id)"
+    )
+
+
+def drop_index(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("planetarium", "0017_astronomyshow_search_vector"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.4 on 2026-10-18 14:48
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def copy_theme_names(apps, schema_editor):
+    AstronomyShow = apps.get_model("planetarium", "AstronomyShow")
+    names = defaultdict(list)
+    show_themes = (
+        AstronomyShow.theme.through.objects.order_by(
+            "astronomyshow_id", "showtheme_id"
+        )
+        .values_list("astronomyshow_id", "showtheme__name")
+        .iterator()
+    )
+    for show_id, name in show_themes:
+        names[show_id].append(name)
+    AstronomyShow.objects.bulk_update(
+        [
+            AstronomyShow(id=show_id, theme_names=theme_names)
+            for show_id, theme_names in names.items()
+        ],
+        ["theme_names"],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0018_astronomyshow_theme_covering_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="astronomyshow",
+            name="theme_names",
+            field=models.JSONField(default=list, editable=False),
+        ),
+        migrations.RunPython(copy_theme_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.4 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("planetarium", "0019_astronomyshow_theme_names"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="showsession",
+            name="version",
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
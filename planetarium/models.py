@@ -1,11 +1,24 @@
+import logging
 import os
 import uuid
+from collections import defaultdict
+from functools import partial, reduce
+from itertools import groupby
+from operator import itemgetter, or_
 
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connections, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.text import slugify
 
+from planetarium.seat_events import publish_seat_changes
+from planetarium.seat_map import SeatMap
+
+logger = logging.getLogger(__name__)
+
 
 class ShowTheme(models.Model):
     name = models.CharField(max_length=63)
@@ -49,10 +62,44 @@ class AstronomyShow(models.Model):
         ShowTheme, blank=True, related_name="astronomy_show"
     )
     image = models.ImageField(null=True, upload_to=movie_image_file_path)
+    search_vector = SearchVectorField(null=True, editable=False)
+    theme_names = models.JSONField(default=list, editable=False)
+
+    SEARCH_CONFIG = "english"
+    THEME_NAMES_BATCH_SIZE = 1000
 
     def __str__(self):
         return self.title
 
+    @staticmethod
+    def update_theme_names(show_ids):
+        """Copy the names of the themes of the shows into theme_names.
+
+        Returns the theme names by show id.
+        """
+        show_ids = sorted(set(show_ids))
+        batch_size = AstronomyShow.THEME_NAMES_BATCH_SIZE
+        names = defaultdict(list)
+        for start in range(0, len(show_ids), batch_size):
+            batch = show_ids[start : start + batch_size]
+            show_themes = (
+                AstronomyShow.theme.through.objects.filter(
+                    astronomyshow_id__in=batch
+                )
+                .order_by("showtheme_id")
+                .values_list("astronomyshow_id", "showtheme__name")
+            )
+            for show_id, name in show_themes:
+                names[show_id].append(name)
+            AstronomyShow.objects.bulk_update(
+                [
+                    AstronomyShow(id=show_id, theme_names=names[show_id])
+                    for show_id in batch
+                ],
+                ["theme_names"],
+            )
+        return names
+
 
 class ShowSession(models.Model):
     astronomy_show = models.ForeignKey(
@@ -62,9 +109,178 @@ class ShowSession(models.Model):
         PlanetariumDome, on_delete=models.CASCADE, related_name="show_session"
     )
     show_time = models.DateTimeField()
+    tickets_sold = models.PositiveIntegerField(default=0, editable=False)
+    seat_map = models.BinaryField(default=b"", editable=False)
+    queued_reservations = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1, editable=False)
 
     class Meta:
         ordering = ["-show_time"]
+        indexes = [
+            models.Index(
+                fields=["astronomy_show", "show_time"],
+                name="show_session_show_time",
+            ),
+            models.Index(
+                fields=["planetarium_dome", "show_time"],
+                name="show_session_dome_time",
+            ),
+        ]
+
+    def get_seat_map(self):
+        return SeatMap(
+            self.planetarium_dome.rows,
+            self.planetarium_dome.seats_in_row,
+            self.seat_map,
+        )
+
+    def get_held_seat_map(self):
+        return SeatMap.from_places(
+            self.planetarium_dome.rows,
+            self.planetarium_dome.seats_in_row,
+            self.seat_holds.active().values_list("row", "seat"),
+        )
+
+    @staticmethod
+    def free_places_near(places, distance=2):
+        """Free (show_session_id, row, seat) places around given places
+
+        Seats up to `distance` seats aside in the same and neighbouring
+        rows are considered; held seats are not free.
+        """
+        seats = defaultdict(list)
+        for show_session_id, row, seat in places:
+            seats[show_session_id].append((row, seat))
+
+        free_places = set()
+        for show_session in ShowSession.objects.select_related(
+            "planetarium_dome"
+        ).filter(pk__in=seats):
+            occupancy = show_session.get_seat_map()
+            occupancy.merge(show_session.get_held_seat_map())
+            for row, seat in seats[show_session.pk]:
+                free_places.update(
+                    (show_session.pk, near_row, near_seat)
+                    for near_row in range(row - 1, row + 2)
+                    for near_seat in range(
+                        seat - distance, seat + distance + 1
+                    )
+                    if 1 <= near_row <= occupancy.rows
+                    and 1 <= near_seat <= occupancy.seats_in_row
+                    and not occupancy.is_taken(near_row, near_seat)
+                )
+        return sorted(free_places)
+
+    @staticmethod
+    def take_seats(places):
+        """Mark (show_session_id, row, seat) places as sold"""
+        ShowSession._update_seats(places, taken=True)
+
+    @staticmethod
+    def release_seats(places):
+        """Mark (show_session_id, row, seat) places as free"""
+        ShowSession._update_seats(places, taken=False)
+
+    @staticmethod
+    def _update_seats(places, taken):
+        seats = defaultdict(list)
+        for show_session_id, row, seat in places:
+            seats[show_session_id].append((row, seat))
+
+        with transaction.atomic():
+            show_sessions = (
+                ShowSession.objects.select_for_update(of=("self",))
+                .select_related("planetarium_dome")
+                .filter(pk__in=seats)
+                .order_by("pk")
+            )
+            for show_session in show_sessions:
+                seat_map = show_session.get_seat_map()
+                for row, seat in seats[show_session.pk]:
+                    if taken:
+                        seat_map.take(row, seat)
+                    else:
+                        seat_map.release(row, seat)
+                count = len(seats[show_session.pk])
+                ShowSession.objects.filter(pk=show_session.pk).update(
+                    seat_map=seat_map.to_bytes(),
+                    tickets_sold=F("tickets_sold")
+                    + (count if taken else -count),
+                    version=F("version") + 1,
+                )
+                transaction.on_commit(
+                    partial(
+                        publish_seat_changes,
+                        show_session.pk,
+                        show_session.version + 1,
+                        seats[show_session.pk],
+                        taken,
+                    )
+                )
+
+    @staticmethod
+    def find_outdated_occupancy(show_sessions):
+        """Yield sessions whose counter or seat map differs from tickets
+
+        The sessions are locked, and get actual_sold and actual_seat_map
+        computed from the tickets table.
+        """
+        locked = (
+            show_sessions.select_for_update(of=("self",))
+            .select_related("planetarium_dome")
+            .order_by("pk")
+            .iterator(chunk_size=500)
+        )
+        places = groupby(
+            Ticket.objects.filter(show_session__in=show_sessions.values("pk"))
+            .order_by("show_session_id")
+            .values_list("show_session_id", "row", "seat")
+            .iterator(chunk_size=5000),
+            key=itemgetter(0),
+        )
+        show_session_places = next(places, (None, ()))
+
+        for show_session in locked:
+            session_places = []
+            while (
+                show_session_places[0] is not None
+                and show_session_places[0] <= show_session.pk
+            ):
+                if show_session_places[0] == show_session.pk:
+                    session_places = [
+                        (row, seat) for _, row, seat in show_session_places[1]
+                    ]
+                show_session_places = next(places, (None, ()))
+
+            seat_map = SeatMap.from_places(
+                show_session.planetarium_dome.rows,
+                show_session.planetarium_dome.seats_in_row,
+                session_places,
+            ).to_bytes()
+            show_session.actual_sold = len(session_places)
+            show_session.actual_seat_map = seat_map
+            if (
+                show_session.tickets_sold != show_session.actual_sold
+                or bytes(show_session.seat_map) != seat_map
+            ):
+                yield show_session
+
+    @staticmethod
+    def rebuild_occupancy(show_sessions):
+        """Recompute counters and seat maps of sessions from tickets.
+
+        Needed whenever bit positions move, e.g. after the rows or seats
+        of a dome changed. Returns the sessions that were outdated.
+        """
+        with transaction.atomic():
+            outdated = list(ShowSession.find_outdated_occupancy(show_sessions))
+            for show_session in outdated:
+                show_session.tickets_sold = show_session.actual_sold
+                show_session.seat_map = show_session.actual_seat_map
+            ShowSession.objects.bulk_update(
+                outdated, ["tickets_sold", "seat_map"], batch_size=500
+            )
+        return outdated
 
     def __str__(self):
         return f"{self.astronomy_show.title}  {self.show_time}min"
@@ -83,6 +299,91 @@ class Reservation(models.Model):
         return str(self.created_at)
 
 
+class SeatsTaken(Exception):
+    """Some of (show_session_id, row, seat) places are already taken"""
+
+    def __init__(self, places):
+        super().__init__(places)
+        self.places = places
+
+
+class TicketManager(models.Manager):
+    """Define a model manager for Ticket model with bulk reservation."""
+
+    INSERT_BATCH_SIZE = 500
+
+    def create_tickets(self, reservation, tickets_data):
+        """Insert all tickets of the reservation with a single query.
+
+        Seat maps of the sessions are locked and updated before the
+        insert, so every writer locks a session before its tickets.
+        """
+        return self.insert_tickets(
+            [
+                self.model(reservation=reservation, **ticket_data)
+                for ticket_data in tickets_data
+            ]
+        )
+
+    def insert_tickets(self, tickets):
+        """Take the seats of unsaved tickets and insert them at once.
+
+        Places that turn out to be taken on insert are skipped by the
+        database, and SeatsTaken with exactly those places is raised.
+        """
+        places = [ticket.place for ticket in tickets]
+        ShowSession.take_seats(places)
+        inserted = {}
+        for start in range(0, len(tickets), self.INSERT_BATCH_SIZE):
+            inserted.update(
+                self._insert_skipping_taken(
+                    tickets[start : start + self.INSERT_BATCH_SIZE]
+                )
+            )
+        collisions = sorted(set(places) - set(inserted))
+        if collisions:
+            raise SeatsTaken(collisions)
+
+        for ticket in tickets:
+            ticket.pk = inserted[ticket.place]
+            ticket._state.adding = False
+            ticket._state.db = self.db
+        SeatHold.objects.filter_places(places).delete()
+        return tickets
+
+    def _insert_skipping_taken(self, tickets):
+        """INSERT ... ON CONFLICT DO NOTHING RETURNING, as {place: id}"""
+        connection = connections[self.db]
+        if connection.vendor not in ("postgresql", "sqlite"):
+            self.bulk_create(tickets)
+            return {ticket.place: ticket.pk for ticket in tickets}
+
+        meta = self.model._meta
+        quote = connection.ops.quote_name
+        columns = [
+            quote(meta.get_field(name).column)
+            for name in ("show_session", "row", "seat", "reservation")
+        ]
+        values = ", ".join(["(%s, %s, %s, %s)"] * len(tickets))
+        sql = (
+            f"INSERT INTO {quote(meta.db_table)} ({', '.join(columns)}) "
+            f"VALUES {values} "
+            f"ON CONFLICT ({', '.join(columns[:3])}) DO NOTHING "
+            f"RETURNING {', '.join(columns[:3])}, {quote(meta.pk.column)}"
+        )
+        params = [
+            value
+            for ticket in tickets
+            for value in (*ticket.place, ticket.reservation_id)
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return {
+                (show_session_id, row, seat): pk
+                for show_session_id, row, seat, pk in cursor.fetchall()
+            }
+
+
 class Ticket(models.Model):
     row = models.IntegerField()
     seat = models.IntegerField()
@@ -93,6 +394,12 @@ class Ticket(models.Model):
         Reservation, on_delete=models.CASCADE, related_name="tickets"
     )
 
+    objects = TicketManager()
+
+    @property
+    def place(self):
+        return self.show_session_id, self.row, self.seat
+
     @staticmethod
     def validate_ticket(row, seat, planetarium_dome, error_to_raise):
         for (
@@ -114,6 +421,45 @@ class Ticket(models.Model):
                     }
                 )
 
+    @staticmethod
+    def validate_seats_free(tickets_data, error_to_raise):
+        """Check all requested seats against seat maps of their sessions
+
+        Seats requested twice raise error_to_raise, taken seats raise
+        SeatsTaken with their places.
+        """
+        requested = set()
+        for ticket_data in tickets_data:
+            place = (
+                ticket_data["show_session"].id,
+                ticket_data["row"],
+                ticket_data["seat"],
+            )
+            if place in requested:
+                raise error_to_raise(
+                    {
+                        "tickets": f"row: {place[1]}, seat: {place[2]} "
+                        f"is requested more than once"
+                    }
+                )
+            requested.add(place)
+
+        show_sessions = {
+            ticket_data["show_session"].id: ticket_data["show_session"]
+            for ticket_data in tickets_data
+        }
+        seat_maps = {
+            show_session_id: show_session.get_seat_map()
+            for show_session_id, show_session in show_sessions.items()
+        }
+        conflicts = sorted(
+            (show_session_id, row, seat)
+            for show_session_id, row, seat in requested
+            if seat_maps[show_session_id].is_taken(row, seat)
+        )
+        if conflicts:
+            raise SeatsTaken(conflicts)
+
     def clean(self):
         Ticket.validate_ticket(
             self.row,
@@ -143,3 +489,314 @@ class Ticket(models.Model):
     class Meta:
         unique_together = ("show_session", "row", "seat")
         ordering = ["show_session", "reservation"]
+
+
+class SeatHoldQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def filter_places(self, places):
+        """Filter holds of (show_session_id, row, seat) places"""
+        places = list(places)
+        if not places:
+            return self.none()
+        return self.filter(
+            reduce(
+                or_,
+                (
+                    Q(show_session_id=show_session_id, row=row, seat=seat)
+                    for show_session_id, row, seat in places
+                ),
+            )
+        )
+
+    def hold_seats(self, user, show_session, seats, duration):
+        """Hold (row, seat) places of the session for the user"""
+        places = [(show_session.id, row, seat) for row, seat in seats]
+        expires_at = timezone.now() + duration
+        with transaction.atomic():
+            self.filter(
+                show_session=show_session, expires_at__lte=timezone.now()
+            ).delete()
+            self.filter_places(places).filter(user=user).delete()
+            return self.bulk_create(
+                [
+                    self.model(
+                        user=user,
+                        show_session=show_session,
+                        row=row,
+                        seat=seat,
+                        expires_at=expires_at,
+                    )
+                    for row, seat in seats
+                ]
+            )
+
+
+class SeatHold(models.Model):
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    show_session = models.ForeignKey(
+        ShowSession, on_delete=models.CASCADE, related_name="seat_holds"
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="seat_holds",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = SeatHoldQuerySet.as_manager()
+
+    @staticmethod
+    def validate_seats_not_held(tickets_data, user, error_to_raise):
+        """Check that no requested seat is held by another user"""
+        held = (
+            SeatHold.objects.active()
+            .filter_places(
+                (
+                    ticket_data["show_session"].id,
+                    ticket_data["row"],
+                    ticket_data["seat"],
+                )
+                for ticket_data in tickets_data
+            )
+            .exclude(user=user)
+            .values_list("show_session_id", "row", "seat")
+            .order_by("show_session_id", "row", "seat")
+        )
+        if held:
+            raise error_to_raise(
+                {
+                    "tickets": [
+                        f"row: {row}, seat: {seat} is held "
+                        f"for show session {show_session_id}"
+                        for show_session_id, row, seat in held
+                    ]
+                }
+            )
+
+    def __str__(self):
+        return (
+            f"{str(self.show_session)} ("
+            f"row: {self.row}, seat: {self.seat}, "
+            f"until: {self.expires_at})"
+        )
+
+    class Meta:
+        unique_together = ("show_session", "row", "seat")
+        indexes = [models.Index(fields=["show_session", "expires_at"])]
+        ordering = ["expires_at"]
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_data = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{self.key} (until: {self.expires_at})"
+
+    class Meta:
+        unique_together = ("user", "key")
+
+
+class ReservationRequestQuerySet(models.QuerySet):
+    def pending(self):
+        return self.filter(status=ReservationRequest.Status.PENDING)
+
+    def process_pending(self, show_session_id, batch_size):
+        """Turn a batch of pending requests of the session into reservations
+
+        Requests are handled in arrival order against the seat map of
+        the session, so accepted ones never conflict with each other
+        and are inserted with one query for reservations and one for
+        tickets. When the batch fails, e.g. on a seat map out of sync
+        with the tickets, its requests are retried one by one and those
+        failing again are marked FAILED, so the queue keeps draining.
+        Returns the number of processed requests.
+        """
+        with transaction.atomic():
+            show_session = (
+                ShowSession.objects.select_for_update(of=("self",))
+                .select_related("planetarium_dome")
+                .get(pk=show_session_id)
+            )
+            requests = list(
+                self.pending()
+                .select_for_update(skip_locked=True)
+                .filter(show_session=show_session)
+                .order_by("id")[:batch_size]
+            )
+            try:
+                with transaction.atomic():
+                    self._grant(show_session, requests)
+            except Exception:
+                logger.exception(
+                    "Batch of reservation requests of show session %s "
+                    "failed, retrying them one by one",
+                    show_session_id,
+                )
+                for request in requests:
+                    self._grant_alone(show_session, request)
+            self.bulk_update(
+                requests, ["status", "reservation", "errors", "processed_at"]
+            )
+            return len(requests)
+
+    def _grant_alone(self, show_session, request):
+        show_session.refresh_from_db(fields=["seat_map"])
+        try:
+            with transaction.atomic():
+                self._grant(show_session, [request])
+        except SeatsTaken as exc:
+            self._fail(
+                request,
+                [
+                    f"row: {row}, seat: {seat} is already taken "
+                    f"for show session {show_session_id}"
+                    for show_session_id, row, seat in exc.places
+                ],
+            )
+        except Exception:
+            logger.exception("Reservation request %s failed", request.pk)
+            self._fail(request, ["The request could not be processed"])
+
+    @staticmethod
+    def _fail(request, errors):
+        request.status = ReservationRequest.Status.FAILED
+        request.reservation = None
+        request.errors = errors
+
+    def _grant(self, show_session, requests):
+        occupancy = show_session.get_seat_map()
+        held = show_session.seat_holds.active().values_list(
+            "row", "seat", "user_id"
+        )
+        holders = {(row, seat): user_id for row, seat, user_id in held}
+
+        accepted = []
+        for request in requests:
+            request.processed_at = timezone.now()
+            outside = [
+                (row, seat)
+                for row, seat in request.seats
+                if (row, seat) not in occupancy
+            ]
+            if outside:
+                self._fail(
+                    request,
+                    [
+                        f"row: {row}, seat: {seat} is outside of the dome "
+                        f"of show session {show_session.id}"
+                        for row, seat in outside
+                    ],
+                )
+                continue
+            unavailable = [
+                (row, seat)
+                for row, seat in request.seats
+                if occupancy.is_taken(row, seat)
+                or holders.get((row, seat), request.user_id) != request.user_id
+            ]
+            if unavailable:
+                self._fail(
+                    request,
+                    [
+                        f"row: {row}, seat: {seat} is already taken "
+                        f"for show session {show_session.id}"
+                        for row, seat in unavailable
+                    ],
+                )
+                continue
+            for row, seat in request.seats:
+                occupancy.take(row, seat)
+            request.status = ReservationRequest.Status.DONE
+            accepted.append(request)
+
+        reservations = Reservation.objects.bulk_create(
+            [Reservation(user_id=request.user_id) for request in accepted]
+        )
+        tickets = []
+        for request, reservation in zip(accepted, reservations):
+            request.reservation = reservation
+            tickets.extend(
+                Ticket(
+                    row=row,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=reservation,
+                )
+                for row, seat in request.seats
+            )
+        if tickets:
+            Ticket.objects.insert_tickets(tickets)
+
+
+class ReservationRequest(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        DONE = "done"
+        FAILED = "failed"
+
+    show_session = models.ForeignKey(
+        ShowSession,
+        on_delete=models.CASCADE,
+        related_name="reservation_requests",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="reservation_requests",
+    )
+    seats = models.JSONField()
+    status = models.CharField(
+        max_length=7, choices=Status.choices, default=Status.PENDING
+    )
+    reservation = models.OneToOneField(
+        Reservation,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="request",
+    )
+    errors = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ReservationRequestQuerySet.as_manager()
+
+    def __str__(self):
+        return f"{str(self.show_session)} ({self.status})"
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["show_session", "id"],
+                condition=Q(status="pending"),
+                name="reservation_request_pending",
+            )
+        ]
@@ -0,0 +1,214 @@
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+from itertools import count
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+SERIALIZER_FILES = (
+    os.path.join("rest_framework", "serializers.py"),
+    os.path.join("rest_framework", "fields.py"),
+    os.path.join("rest_framework", "relations.py"),
+    os.path.join("planetarium", "serializers.py"),
+    os.path.join("planetarium", "fast_serializers.py"),
+)
+
+profiles = deque(maxlen=settings.PROFILER_BUFFER_SIZE)
+profile_ids = count(1)
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class StackSampler(threading.Thread):
+    """Sample the stack of one thread every interval seconds.
+
+    Stacks are folded root first ("a;b;c") and counted, which is the
+    input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.serializer_samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            in_serializer = False
+            while frame is not None:
+                labels.append(frame_label(frame))
+                in_serializer |= frame.f_code.co_filename.endswith(
+                    SERIALIZER_FILES
+                )
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+                self.serializer_samples += in_serializer
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class QueryTimer:
+    """Database execute wrapper adding up SQL time and count"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class ProfilerMiddleware:
+    """Profile single requests in production.
+
+    A request is profiled when a staff user sends the PROFILER_HEADER
+    header, or at random with PROFILER_SAMPLE_RATE. It records wall
+    time, SQL time and count, sampled serializer time and a stack
+    profile into a ring buffer of PROFILER_BUFFER_SIZE entries per
+    process. Other requests only pay for a header lookup.
+
+    Staff is recognized by the session or by the JWT of the request, so
+    the middleware goes after AuthenticationMiddleware.
+
+    Under ASGI, requests that are not profiled stay on the event loop. A
+    profiled request runs the rest of the chain from a worker thread,
+    where synchronous views also run, so that thread is the one sampled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = "HTTP_" + settings.PROFILER_HEADER.upper().replace(
+            "-", "_"
+        )
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not await self.ashould_profile(request):
+            return await self.get_response(request)
+        return await sync_to_async(self.profile)(
+            request, async_to_sync(self.get_response)
+        )
+
+    def should_profile(self, request):
+        if self.header in request.META:
+            return self.is_staff(request)
+        return self.sampled()
+
+    async def ashould_profile(self, request):
+        if self.header in request.META:
+            return await sync_to_async(self.is_staff)(request)
+        return self.sampled()
+
+    @staticmethod
+    def sampled():
+        rate = settings.PROFILER_SAMPLE_RATE
+        return rate > 0 and random.random() < rate
+
+    @staticmethod
+    def is_staff(request):
+        if request.user.is_staff:
+            return True
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+    def profile(self, request, get_response):
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILER_INTERVAL
+        )
+        timers = {alias: QueryTimer() for alias in connections}
+        started_at = timezone.now()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            with ExitStack() as stack:
+                for alias, timer in timers.items():
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timer)
+                    )
+                response = get_response(request)
+        finally:
+            wall = time.perf_counter() - start
+            sampler.stop()
+
+        samples = sum(sampler.stacks.values())
+        profile = {
+            "id": next(profile_ids),
+            "method": request.method,
+            "path": request.get_full_path(),
+            "status": response.status_code,
+            "started_at": started_at,
+            "wall_ms": round(wall * 1000, 3),
+            "sql_ms": round(
+                sum(timer.seconds for timer in timers.values()) * 1000, 3
+            ),
+            "sql_count": sum(timer.count for timer in timers.values()),
+            "serializer_ms": round(
+                wall * 1000 * sampler.serializer_samples / samples, 3
+            )
+            if samples
+            else 0.0,
+            "samples": samples,
+            "stacks": sampler.stacks,
+        }
+        profiles.append(profile)
+        response[PROFILE_ID_HEADER] = str(profile["id"])
+        return response
+
+
+def get_profile(profile_id):
+    for profile in profiles:
+        if profile["id"] == profile_id:
+            return profile
+    return None
+
+
+def folded_stacks(profile):
+    """Return the profile in the folded stack format of flamegraph.pl"""
+    return "".join(
+        f"{stack} {samples}\n"
+        for stack, samples in profile["stacks"].most_common()
+    )
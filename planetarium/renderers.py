@@ -0,0 +1,93 @@
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+LINE_SEPARATORS = (
+    (b"\xe2\x80\xa8", b"\\u2028"),
+    (b"\xe2\x80\xa9", b"\\u2029"),
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSON renderer backed by orjson, DRF's renderer without it.
+
+    orjson serializes dicts, ReturnDict/ReturnList and datetimes natively,
+    anything else (Decimal, lazy strings, querysets) goes through the
+    default of DRF's encoder. Indented, non-compact or ASCII-only output
+    is left to DRF.
+    """
+
+    options = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if orjson is None or indent or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=JSONEncoder().default, option=self.options
+        )
+        for separator, escaped in LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
+
+
+class StreamedContentRenderer(BaseRenderer):
+    """Accept the media type of a response the view streams itself.
+
+    The view builds the body of successful responses, so only errors go
+    through render(), as JSON whatever media type was accepted.
+    """
+
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        if response is not None:
+            response["Content-Type"] = ORJSONRenderer.media_type
+        return ORJSONRenderer().render(data)
+
+
+class CSVRenderer(StreamedContentRenderer):
+    media_type = "text/csv"
+    format = "csv"  # noqa: VNE003
+
+
+class NDJSONRenderer(StreamedContentRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"  # noqa: VNE003
+
+
+class EventStreamRenderer(StreamedContentRenderer):
+    media_type = "text/event-stream"
+    format = "event-stream"  # noqa: VNE003
+
+
+class ORJSONParser(JSONParser):
+    """JSON parser backed by orjson for UTF-8 bodies"""
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if orjson is None or codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,38 @@
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.response import Response
+
+from planetarium.serializers import ReservationRequestSerializer
+
+
+class QueuedReservationCreateMixin:
+    """Put reservations for queued show sessions into their queue.
+
+    Reservations for a session with queued_reservations are not created
+    in the request: a reservation request is stored and processed in
+    batches by the process_reservation_queue worker, and the client
+    polls the returned URL for the result.
+    """
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.queued_show_session is None:
+            self.perform_create(serializer)
+            headers = self.get_success_headers(serializer.data)
+            return Response(
+                serializer.data,
+                status=status.HTTP_201_CREATED,
+                headers=headers,
+            )
+
+        reservation_request = serializer.enqueue(user=request.user)
+        location = reverse(
+            "planetarium:reservationrequest-detail",
+            args=[reservation_request.id],
+        )
+        return Response(
+            ReservationRequestSerializer(reservation_request).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": location},
+        )
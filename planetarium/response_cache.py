@@ -0,0 +1,304 @@
+import hashlib
+import time
+from io import BytesIO
+from threading import Thread
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections
+from django.utils.cache import quote_etag
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from planetarium.cache import get_model_version
+
+RESPONSE_CACHE_NAMESPACE = "response"
+RESPONSE_CACHE_HEADER = "X-Cache"
+LOCK_POLL_INTERVAL = 0.05
+
+
+def request_digest(request):
+    """Hash of the absolute URL of the request with sorted query params"""
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = request.build_absolute_uri(request.path)
+    return hashlib.sha256(f"{url}?{params}".encode()).hexdigest()
+
+
+def etag_matches(etag, if_none_match):
+    """Weak comparison of If-None-Match against the current ETag"""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return "*" in etags or etag in (tag.removeprefix("W/") for tag in etags)
+
+
+class VersionedResponseCacheMixin:
+    """Cache list and retrieve responses until one of cache_models changes.
+
+    The key holds the version stamps of cache_models, the host and the
+    normalized query params, so a signal bumping a stamp makes every
+    older entry unreachable and the backend evicts it in LRU order.
+    Authentication, permissions and throttling still run on every
+    request.
+    """
+
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_response_cache_key(self, request):
+        versions = ".".join(
+            str(get_model_version(model, RESPONSE_CACHE_NAMESPACE))
+            for model in self.cache_models
+        )
+        return f"planetarium:response:{versions}:{request_digest(request)}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers={RESPONSE_CACHE_HEADER: "HIT"})
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data)
+            response[RESPONSE_CACHE_HEADER] = "MISS"
+        return response
+
+
+class StaleWhileRevalidateMixin:
+    """Serve list responses from cache, refreshed after a soft TTL.
+
+    An entry younger than SOFT_TTL is served as is. An older one is
+    still served right away while a single request per key, holding a
+    cache.add lock, recomputes it: in a background thread, or inline
+    when BACKGROUND_REFRESH is off. On a cold miss only the lock holder
+    queries the database, the other requests wait for its entry for up
+    to LOCK_TIMEOUT seconds and then compute it themselves, leaving the
+    lock to its holder. Entries expire after HARD_TTL.
+
+    The background thread gets the request as plain data and rebuilds
+    its own view and request from it, since the originals go on serving
+    the stale response.
+    """
+
+    stale_while_revalidate_setting = None
+
+    def list(self, request, *args, **kwargs):
+        options = getattr(settings, self.stale_while_revalidate_setting)
+        cache = caches[settings.RESPONSE_CACHE_ALIAS]
+        key = f"planetarium:swr:{request_digest(request)}"
+        lock_key = f"{key}:lock"
+        entry = cache.get(key)
+
+        if entry is None:
+            if not cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+                entry = self.wait_for_entry(cache, key, options)
+                if entry is not None:
+                    return self.cached(entry, "HIT")
+                # The lock holder is still running, compute without the lock
+                return self.refresh(
+                    cache,
+                    key,
+                    lock_key,
+                    options,
+                    request,
+                    *args,
+                    owns_lock=False,
+                    **kwargs,
+                )
+            return self.refresh(
+                cache, key, lock_key, options, request, *args, **kwargs
+            )
+
+        if entry["fresh_until"] > time.time():
+            return self.cached(entry, "HIT")
+        if cache.add(lock_key, 1, options["LOCK_TIMEOUT"]):
+            if not options["BACKGROUND_REFRESH"]:
+                return self.refresh(
+                    cache, key, lock_key, options, request, *args, **kwargs
+                )
+            Thread(
+                target=self.refresh_in_background,
+                args=(
+                    cache,
+                    key,
+                    lock_key,
+                    options,
+                    self.get_refresh_environ(request),
+                    request.user.pk,
+                    args,
+                    kwargs,
+                ),
+                daemon=True,
+            ).start()
+        return self.cached(entry, "STALE")
+
+    @staticmethod
+    def cached(entry, state):
+        return Response(entry["data"], headers={RESPONSE_CACHE_HEADER: state})
+
+    @staticmethod
+    def wait_for_entry(cache, key, options):
+        deadline = time.monotonic() + options["LOCK_TIMEOUT"]
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry
+        return None
+
+    def refresh(
+        self,
+        cache,
+        key,
+        lock_key,
+        options,
+        request,
+        *args,
+        owns_lock=True,
+        **kwargs,
+    ):
+        try:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == 200:
+                entry = {
+                    "data": response.data,
+                    "fresh_until": time.time() + options["SOFT_TTL"],
+                }
+                cache.set(key, entry, options["HARD_TTL"])
+                response[RESPONSE_CACHE_HEADER] = "MISS"
+            return response
+        finally:
+            if owns_lock:
+                cache.delete(lock_key)
+
+    @staticmethod
+    def get_refresh_environ(request):
+        """WSGI environ of request with string values only"""
+        environ = {
+            name: value
+            for name, value in request.META.items()
+            if isinstance(value, str)
+        }
+        environ.update(
+            {
+                "REQUEST_METHOD": "GET",
+                "SCRIPT_NAME": request.META.get("SCRIPT_NAME", ""),
+                "PATH_INFO": request.path_info,
+                "wsgi.url_scheme": request.scheme,
+            }
+        )
+        return environ
+
+    def get_refresh_request(self, environ, user_id):
+        request = self.initialize_request(
+            WSGIRequest({**environ, "wsgi.input": BytesIO()})
+        )
+        if user_id is None:
+            request.user = AnonymousUser()
+        else:
+            request.user = get_user_model()._default_manager.get(pk=user_id)
+        return request
+
+    @classmethod
+    def refresh_in_background(
+        cls, cache, key, lock_key, options, environ, user_id, args, kwargs
+    ):
+        try:
+            view = cls(
+                action_map={"get": "list"},
+                args=args,
+                kwargs=kwargs,
+                format_kwarg=None,
+            )
+            view.request = view.get_refresh_request(environ, user_id)
+            view.refresh(
+                cache, key, lock_key, options, view.request, *args, **kwargs
+            )
+        finally:
+            close_old_connections()
+
+
+class ConditionalRetrieveMixin:
+    """Answer If-None-Match of detail endpoints with 304 Not Modified.
+
+    The strong ETag hashes the etag_version_field of the object and the
+    etag annotations of the action, read with one primary key lookup,
+    the response version stamps of the etag_models embedded in the
+    representation, the accepted media type and the serializer context
+    entries named in etag_context_keys. The full queryset and serializer
+    only run when the client copy is outdated. Object permissions are
+    not checked before a 304, so the mixin only fits views without them.
+    """
+
+    etag_models = ()
+    etag_version_field = "version"
+    etag_context_keys = ()
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_etag_annotations(self):
+        return {}
+
+    def get_etag_variant(self):
+        """Request inputs other than the data that shape the response"""
+        context = self.get_serializer_context()
+        return (
+            self.request.accepted_media_type,
+            *(context.get(key) for key in self.etag_context_keys),
+        )
+
+    def get_etag(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        annotations = self.get_etag_annotations()
+        try:
+            row = (
+                self.queryset.model._default_manager.filter(
+                    **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+                )
+                .annotate(**annotations)
+                .values_list(self.etag_version_field, *annotations)
+                .first()
+            )
+        except (TypeError, ValueError):
+            return None
+        if row is None:
+            return None
+
+        stamps = (
+            get_model_version(model, RESPONSE_CACHE_NAMESPACE)
+            for model in self.etag_models
+        )
+        values = (*row, *stamps, *self.get_etag_variant())
+        digest = hashlib.sha256(
+            ".".join(str(value) for value in values).encode()
+        ).hexdigest()
+        return quote_etag(digest[:32])
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag = self.get_etag()
+        if etag is not None and etag_matches(
+            etag, request.headers.get("If-None-Match")
+        ):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        response = handler(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response["ETag"] = etag
+        return response
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+_brokers = {}
+
+
+def show_session_channel(show_session_id):
+    return f"show_session:{show_session_id}"
+
+
+def format_event(event, data, event_id=None):
+    """Encode one message of the text/event-stream format"""
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """Bounded queue of one subscriber, fed from any thread.
+
+    A subscriber too slow to keep up loses messages instead of growing
+    the queue; overflowed tells it to resynchronize.
+    """
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Next message, or None when timeout seconds pass without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class InProcessBroker:
+    """Fan out messages to the asyncio subscribers of this process.
+
+    publish() may be called from any thread, subscribers are plain
+    queues on their event loop, so idle subscribers cost no thread.
+    """
+
+    def __init__(self, options):
+        self.queue_size = options["QUEUE_SIZE"]
+        self.subscriptions = defaultdict(set)
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        self.deliver(channel, message)
+
+    def deliver(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.offer(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        subscription = Subscription(
+            asyncio.get_running_loop(), self.queue_size
+        )
+        with self.lock:
+            self.subscriptions[channel].add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self.lock:
+                self.subscriptions[channel].discard(subscription)
+                if not self.subscriptions[channel]:
+                    del self.subscriptions[channel]
+
+
+class CacheBroker(InProcessBroker):
+    """Share messages between processes through a Django cache.
+
+    Messages of a channel are numbered by a counter in the cache and
+    kept for MESSAGE_TIMEOUT seconds. One task per event loop polls the
+    counters of the channels with local subscribers every POLL_INTERVAL
+    seconds and delivers new messages to them, so every worker sees
+    what any worker published.
+    """
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.cache = caches[options.get("CACHE_ALIAS", "default")]
+        self.poll_interval = options["POLL_INTERVAL"]
+        self.message_timeout = options["MESSAGE_TIMEOUT"]
+        self.positions = {}
+        self.pollers = {}
+
+    @staticmethod
+    def counter_key(channel):
+        return f"planetarium:events:{channel}"
+
+    def publish(self, channel, message):
+        key = self.counter_key(channel)
+        self.cache.add(key, 0, timeout=None)
+        number = self.cache.incr(key)
+        self.cache.set(f"{key}:{number}", message, self.message_timeout)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        if channel not in self.positions:
+            key = self.counter_key(channel)
+            self.positions[channel] = await self.cache.aget(key, 0)
+        loop = asyncio.get_running_loop()
+        if loop not in self.pollers or self.pollers[loop].done():
+            self.pollers[loop] = loop.create_task(self.poll())
+        async with super().subscribe(channel) as subscription:
+            yield subscription
+
+    async def poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            with self.lock:
+                channels = list(self.subscriptions)
+            for channel in set(self.positions) - set(channels):
+                del self.positions[channel]
+            if not channels:
+                return
+            counters = await self.cache.aget_many(
+                [self.counter_key(channel) for channel in channels]
+            )
+            for channel in channels:
+                key = self.counter_key(channel)
+                last = counters.get(key, 0)
+                first = self.positions.get(channel, last) + 1
+                self.positions[channel] = last
+                if first > last:
+                    continue
+                keys = [f"{key}:{number}" for number in range(first, last + 1)]
+                messages = await self.cache.aget_many(keys)
+                for message_key in keys:
+                    if message_key in messages:
+                        self.deliver(channel, messages[message_key])
+
+
+def get_broker():
+    options = settings.SEAT_EVENTS
+    backend = options["BACKEND"]
+    if backend not in _brokers:
+        _brokers[backend] = import_string(backend)(options)
+    return _brokers[backend]
+
+
+def publish_seat_changes(show_session_id, version, seats, taken):
+    """Announce (row, seat) places taken or released by a commit"""
+    places = [[row, seat] for row, seat in seats]
+    get_broker().publish(
+        show_session_channel(show_session_id),
+        {
+            "show_session": show_session_id,
+            "version": version,
+            "taken": places if taken else [],
+            "released": [] if taken else places,
+        },
+    )
+
+
+async def seat_event_stream(show_session_id, version, last_event_id):
+    """Server-sent events of the seats of one show session.
+
+    Events carry the session version as their id. A "seats" event holds
+    the places taken and released by one commit. A "reset" event asks
+    the client to refetch the session: on reconnect with an outdated
+    Last-Event-ID, after a missed version or a queue overflow. The
+    stream ends after MAX_AGE seconds and the client reconnects, which
+    also bounds streams of clients gone without notice.
+    """
+    options = settings.SEAT_EVENTS
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + options["MAX_AGE"]
+    async with get_broker().subscribe(
+        show_session_channel(show_session_id)
+    ) as subscription:
+        yield f"retry: {options['RETRY']}\n\n"
+        if last_event_id is not None and last_event_id != str(version):
+            yield format_event("reset", {"version": version}, version)
+
+        while (remaining := deadline - loop.time()) > 0:
+            message = await subscription.get(
+                min(options["HEARTBEAT"], remaining)
+            )
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            if message["version"] <= version:
+                continue
+            if subscription.overflowed or message["version"] > version + 1:
+                subscription.overflowed = False
+                version = message["version"]
+                yield format_event("reset", {"version": version}, version)
+                continue
+            version = message["version"]
+            yield format_event("seats", message, version)
@@ -0,0 +1,128 @@
+import base64
+
+SEAT_MAP_ENCODINGS = ("base64", "rle")
+
+
+class SeatMap:
+    """Occupancy of a dome as a bitset of rows * seats_in_row bits.
+
+    Seats are numbered row by row starting from (1, 1): the bit of
+    (row, seat) is (row - 1) * seats_in_row + (seat - 1), and bit 0 is
+    the most significant bit of the first byte. A set bit is a taken seat.
+    """
+
+    def __init__(self, rows, seats_in_row, data=b""):
+        self.rows = rows
+        self.seats_in_row = seats_in_row
+        size = (rows * seats_in_row + 7) // 8
+        self.bits = bytearray(bytes(data or b"")[:size]).ljust(size, b"\0")
+
+    @classmethod
+    def from_places(cls, rows, seats_in_row, places):
+        """Build the map from (row, seat) pairs of taken places.
+
+        Places outside of the dome, e.g. tickets sold before it shrank,
+        do not take a seat.
+        """
+        seat_map = cls(rows, seats_in_row)
+        for row, seat in places:
+            if (row, seat) in seat_map:
+                seat_map.take(row, seat)
+        return seat_map
+
+    def __contains__(self, place):
+        row, seat = place
+        return 1 <= row <= self.rows and 1 <= seat <= self.seats_in_row
+
+    def _position(self, row, seat):
+        if (row, seat) not in self:
+            raise IndexError(
+                f"row {row}, seat {seat} is outside of the "
+                f"{self.rows}x{self.seats_in_row} seat map"
+            )
+        index = (row - 1) * self.seats_in_row + (seat - 1)
+        return index >> 3, 0x80 >> (index & 7)
+
+    def is_taken(self, row, seat):
+        if (row, seat) not in self:
+            return False
+        byte, mask = self._position(row, seat)
+        return bool(self.bits[byte] & mask)
+
+    def take(self, row, seat):
+        byte, mask = self._position(row, seat)
+        self.bits[byte] |= mask
+
+    def release(self, row, seat):
+        """Free the seat; places outside of the dome are never taken"""
+        if (row, seat) not in self:
+            return
+        byte, mask = self._position(row, seat)
+        self.bits[byte] &= ~mask
+
+    def __iter__(self):
+        """Iterate over occupancy flags of all seats row by row"""
+        for index in range(self.rows * self.seats_in_row):
+            yield bool(self.bits[index >> 3] & (0x80 >> (index & 7)))
+
+    def merge(self, other):
+        """Mark seats taken in the other map as taken in this one"""
+        for index, byte in enumerate(other.bits):
+            self.bits[index] |= byte
+
+    def best_block(self, size):
+        """Find the free block of adjacent seats closest to the centre.
+
+        Returns (row, first seat) of the block of `size` free seats in
+        one row whose middle is nearest to the middle of the dome, or
+        None when no row has such a block.
+        """
+        if not 1 <= size <= self.seats_in_row:
+            return None
+
+        centre_row = (self.rows + 1) / 2
+        centre_seat = (self.seats_in_row + 1) / 2
+        best, best_score = None, None
+        seats = iter(self)
+        for row in range(1, self.rows + 1):
+            run_start = None
+            for seat in range(1, self.seats_in_row + 2):
+                taken = seat > self.seats_in_row or next(seats)
+                if not taken:
+                    if run_start is None:
+                        run_start = seat
+                    continue
+                if run_start is not None and seat - run_start >= size:
+                    first = round(centre_seat - (size - 1) / 2)
+                    first = min(max(first, run_start), seat - size)
+                    score = (row - centre_row) ** 2 + (
+                        first + (size - 1) / 2 - centre_seat
+                    ) ** 2
+                    if best_score is None or score < best_score:
+                        best, best_score = (row, first), score
+                run_start = None
+        return best
+
+    def to_bytes(self):
+        return bytes(self.bits)
+
+    def to_base64(self):
+        return base64.b64encode(self.bits).decode()
+
+    def to_rle(self):
+        """Lengths of alternating free and taken runs, starting with free"""
+        runs = []
+        current, length = False, 0
+        for taken in self:
+            if taken == current:
+                length += 1
+            else:
+                runs.append(length)
+                current, length = taken, 1
+        runs.append(length)
+        return runs
+
+    def encode(self, encoding):
+        if encoding == "rle":
+            return self.to_rle()
+        return self.to_base64()
@@ -1,7 +1,11 @@
-from django.db import transaction
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, IntegrityError
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from planetarium.exceptions import SeatConflict
 from planetarium.models import (
     ShowTheme,
     PlanetariumDome,
@@ -9,6 +13,9 @@ from planetarium.models import (
     ShowSession,
     Reservation,
     Ticket,
+    SeatHold,
+    ReservationRequest,
+    SeatsTaken,
 )
 
 
@@ -48,8 +55,8 @@ class AstronomyShowSerializer(serializers.ModelSerializer):
 
 
 class AstronomyShowListSerializer(AstronomyShowSerializer):
-    theme = serializers.SlugRelatedField(
-        many=True, read_only=True, slug_field="name"
+    theme = serializers.ListField(
+        source="theme_names", child=serializers.CharField(), read_only=True
     )
 
     class Meta:
@@ -71,10 +78,22 @@ class AstronomyShowImageSerializer(serializers.ModelSerializer):
         fields = ("id", "image")
 
 
+class AstronomyShowSuggestionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AstronomyShow
+        fields = ("id", "title")
+
+
 class ShowSessionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShowSession
-        fields = ("id", "astronomy_show", "planetarium_dome", "show_time")
+        fields = (
+            "id",
+            "astronomy_show",
+            "planetarium_dome",
+            "show_time",
+            "queued_reservations",
+        )
 
 
 class ShowSessionListSerializer(serializers.ModelSerializer):
@@ -158,20 +177,10 @@ class TicketListSerializer(TicketSerializer):
         )
 
 
-class TicketSeatsSerializer(TicketSerializer):
-    class Meta:
-        model = Ticket
-        fields = ("row", "seat")
-
-
 class ShowSessionDetailSerializer(serializers.ModelSerializer):
     planetarium_dome = PlanetariumDomeSerializer(many=False, read_only=True)
     astronomy_show = AstronomyShowListSerializer(many=False, read_only=True)
-    taken_places = TicketSeatsSerializer(
-        source="tickets",
-        many=True,
-        read_only=True,
-    )
+    seat_map = serializers.SerializerMethodField()
 
     class Meta:
         model = ShowSession
@@ -180,24 +189,151 @@ class ShowSessionDetailSerializer(serializers.ModelSerializer):
             "show_time",
             "astronomy_show",
             "planetarium_dome",
-            "taken_places",
+            "seat_map",
+        )
+
+    def get_seat_map(self, obj) -> str:
+        return obj.get_seat_map().to_base64()
+
+
+class ShowSessionSeatMapSerializer(serializers.ModelSerializer):
+    rows = serializers.IntegerField(
+        source="planetarium_dome.rows", read_only=True
+    )
+    seats_in_row = serializers.IntegerField(
+        source="planetarium_dome.seats_in_row", read_only=True
+    )
+    encoding = serializers.SerializerMethodField()
+    seat_map = serializers.SerializerMethodField()
+    held = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ShowSession
+        fields = (
+            "id",
+            "rows",
+            "seats_in_row",
+            "encoding",
+            "seat_map",
+            "held",
+        )
+
+    def get_encoding(self, obj) -> str:
+        return self.context.get("encoding", "base64")
+
+    def get_seat_map(self, obj):
+        return obj.get_seat_map().encode(self.get_encoding(obj))
+
+    def get_held(self, obj):
+        return obj.get_held_seat_map().encode(self.get_encoding(obj))
+
+
+class ShowSessionRelatedField(serializers.PrimaryKeyRelatedField):
+    """Show session field that resolves preloaded sessions without queries"""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault(
+            "queryset", ShowSession.objects.select_related("planetarium_dome")
         )
+        super().__init__(**kwargs)
+        self.preloaded = {}
+
+    def preload(self, pks):
+        self.preloaded = self.get_queryset().in_bulk(pks)
+
+    def to_internal_value(self, data):
+        try:
+            return self.preloaded[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class ReservationTicketListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        """Load show sessions and domes of all tickets with one query"""
+        if isinstance(data, list):
+            pks = set()
+            for ticket_data in data:
+                try:
+                    pks.add(int(ticket_data["show_session"]))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            self.child.fields["show_session"].preload(pks)
+        return super().to_internal_value(data)
+
+
+class ReservationTicketSerializer(TicketSerializer):
+    show_session = ShowSessionRelatedField()
+
+    class Meta:
+        model = Ticket
+        fields = ("id", "row", "seat", "show_session")
+        list_serializer_class = ReservationTicketListSerializer
+        # seats are checked for the whole reservation in one query
+        validators = []
 
 
 class ReservationSerializer(serializers.ModelSerializer):
-    tickets = TicketSerializer(many=True, read_only=False, allow_null=False)
+    tickets = ReservationTicketSerializer(
+        many=True, read_only=False, allow_null=False
+    )
 
     class Meta:
         model = Reservation
         fields = ("id", "tickets")
 
+    def validate(self, attrs):
+        data = super(ReservationSerializer, self).validate(attrs=attrs)
+        try:
+            Ticket.validate_seats_free(attrs["tickets"], ValidationError)
+        except SeatsTaken as error:
+            raise SeatConflict(error.places)
+        request = self.context.get("request")
+        if request:
+            SeatHold.validate_seats_not_held(
+                attrs["tickets"], request.user, ValidationError
+            )
+        show_sessions = {
+            ticket_data["show_session"] for ticket_data in attrs["tickets"]
+        }
+        if len(show_sessions) > 1 and any(
+            show_session.queued_reservations for show_session in show_sessions
+        ):
+            raise ValidationError(
+                {
+                    "tickets": "Reservations for a queued show session "
+                    "must contain tickets of that session only"
+                }
+            )
+        return data
+
+    @property
+    def queued_show_session(self):
+        """Show session whose reservations go through the queue, if any"""
+        for ticket_data in self.validated_data["tickets"]:
+            if ticket_data["show_session"].queued_reservations:
+                return ticket_data["show_session"]
+        return None
+
+    def enqueue(self, user):
+        return ReservationRequest.objects.create(
+            user=user,
+            show_session=self.queued_show_session,
+            seats=[
+                [ticket_data["row"], ticket_data["seat"]]
+                for ticket_data in self.validated_data["tickets"]
+            ],
+        )
+
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            reservation = Reservation.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(reservation=reservation, **ticket_data)
-            return reservation
+        try:
+            with transaction.atomic():
+                tickets_data = validated_data.pop("tickets")
+                reservation = Reservation.objects.create(**validated_data)
+                Ticket.objects.create_tickets(reservation, tickets_data)
+                return reservation
+        except SeatsTaken as error:
+            raise SeatConflict(error.places)
 
 
 class ReservationListSerializer(ReservationSerializer):
@@ -207,3 +343,172 @@ class ReservationListSerializer(ReservationSerializer):
     class Meta:
         model = Reservation
         fields = ("id", "tickets", "created_at", "reservation_owner")
+
+
+class SeatSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    seat = serializers.IntegerField()
+
+
+class SeatHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SeatHold
+        fields = ("id", "show_session", "row", "seat", "expires_at")
+
+
+class SeatHoldCreateSerializer(serializers.Serializer):
+    show_session = ShowSessionRelatedField()
+    seats = SeatSerializer(many=True, allow_empty=False)
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.SEAT_HOLD_MAX_MINUTES,
+        default=settings.SEAT_HOLD_MINUTES,
+    )
+
+    def validate(self, attrs):
+        tickets_data = [
+            {"show_session": attrs["show_session"], **seat}
+            for seat in attrs["seats"]
+        ]
+        for ticket_data in tickets_data:
+            Ticket.validate_ticket(
+                ticket_data["row"],
+                ticket_data["seat"],
+                attrs["show_session"].planetarium_dome,
+                ValidationError,
+            )
+        try:
+            Ticket.validate_seats_free(tickets_data, ValidationError)
+        except SeatsTaken as error:
+            raise SeatConflict(error.places)
+        return attrs
+
+    def create(self, validated_data):
+        try:
+            return SeatHold.objects.hold_seats(
+                validated_data["user"],
+                validated_data["show_session"],
+                [
+                    (seat["row"], seat["seat"])
+                    for seat in validated_data["seats"]
+                ],
+                timedelta(minutes=validated_data["minutes"]),
+            )
+        except IntegrityError:
+            raise ValidationError(
+                {"seats": "Some of the seats are held by another user"}
+            )
+
+
+class SeatHoldCheckoutSerializer(serializers.Serializer):
+    show_session = serializers.PrimaryKeyRelatedField(
+        queryset=ShowSession.objects.all(), required=False
+    )
+
+    def create(self, validated_data):
+        """Promote active holds of the user to a reservation"""
+        try:
+            with transaction.atomic():
+                return self._promote_holds(validated_data)
+        except SeatsTaken as error:
+            raise SeatConflict(error.places)
+
+    @staticmethod
+    def _promote_holds(validated_data):
+        holds = SeatHold.objects.active().select_for_update()
+        holds = holds.filter(user=validated_data["user"])
+        if "show_session" in validated_data:
+            holds = holds.filter(show_session=validated_data["show_session"])
+        holds = list(holds)
+        if not holds:
+            raise ValidationError(
+                {"show_session": "There are no active seat holds"}
+            )
+
+        reservation = Reservation.objects.create(user=validated_data["user"])
+        Ticket.objects.create_tickets(
+            reservation,
+            [
+                {
+                    "row": hold.row,
+                    "seat": hold.seat,
+                    "show_session_id": hold.show_session_id,
+                }
+                for hold in holds
+            ],
+        )
+        return reservation
+
+
+class ShowSessionAllocateSerializer(serializers.Serializer):
+    party_size = serializers.IntegerField(min_value=1)
+
+    def create(self, validated_data):
+        """Reserve the best block of adjacent free seats of the session"""
+        party_size = validated_data["party_size"]
+        with transaction.atomic():
+            show_session = (
+                ShowSession.objects.select_for_update(of=("self",))
+                .select_related("planetarium_dome")
+                .get(pk=validated_data["show_session"].pk)
+            )
+            occupancy = show_session.get_seat_map()
+            occupancy.merge(show_session.get_held_seat_map())
+            block = occupancy.best_block(party_size)
+            if block is None:
+                raise ValidationError(
+                    {
+                        "party_size": f"There are no {party_size} "
+                        f"adjacent free seats in one row"
+                    }
+                )
+
+            row, first_seat = block
+            reservation = Reservation.objects.create(
+                user=validated_data["user"]
+            )
+            Ticket.objects.create_tickets(
+                reservation,
+                [
+                    {"row": row, "seat": seat, "show_session": show_session}
+                    for seat in range(first_seat, first_seat + party_size)
+                ],
+            )
+            return reservation
+
+
+class ReservationRequestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ReservationRequest
+        fields = (
+            "id",
+            "show_session",
+            "seats",
+            "status",
+            "reservation",
+            "errors",
+            "created_at",
+            "processed_at",
+        )
+
+
+class ProfileSerializer(serializers.Serializer):
+    id = serializers.IntegerField()  # noqa: VNE003
+    method = serializers.CharField()
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    started_at = serializers.DateTimeField()
+    wall_ms = serializers.FloatField()
+    sql_ms = serializers.FloatField()
+    sql_count = serializers.IntegerField()
+    serializer_ms = serializers.FloatField()
+    samples = serializers.IntegerField()
+
+
+class ProfileStackSerializer(serializers.Serializer):
+    stack = serializers.ListField(child=serializers.CharField())
+    samples = serializers.IntegerField()
+
+
+class ProfileDetailSerializer(ProfileSerializer):
+    top_stacks = ProfileStackSerializer(many=True)
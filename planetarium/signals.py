@@ -0,0 +1,181 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from planetarium.cache import bump_model_version
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+from planetarium.response_cache import RESPONSE_CACHE_NAMESPACE
+from planetarium.title_index import title_changed
+
+
+@receiver(pre_save, sender=Ticket)
+def remember_ticket_place(sender, instance, **kwargs):
+    """Keep the place the ticket held before an update"""
+    instance.previous_place = None
+    if not instance._state.adding:
+        instance.previous_place = (
+            Ticket.objects.filter(pk=instance.pk)
+            .values_list("show_session_id", "row", "seat")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Ticket)
+def take_ticket_seat(sender, instance, created, **kwargs):
+    """Account the seat of a ticket saved outside of a reservation"""
+    previous_place = getattr(instance, "previous_place", None)
+    if created:
+        ShowSession.take_seats([instance.place])
+    elif previous_place and previous_place != instance.place:
+        ShowSession.release_seats([previous_place])
+        ShowSession.take_seats([instance.place])
+
+
+def deleted_with_reservation(origin):
+    """Whether a delete started from reservations, which free the seats"""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Reservation
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_seat(sender, instance, origin=None, **kwargs):
+    if not deleted_with_reservation(origin):
+        ShowSession.release_seats([instance.place])
+
+
+@receiver(pre_delete, sender=Reservation)
+def remember_reservation_places(sender, instance, origin=None, **kwargs):
+    instance.ticket_places = []
+    if deleted_with_reservation(origin):
+        instance.ticket_places = list(
+            instance.tickets.values_list("show_session_id", "row", "seat")
+        )
+
+
+@receiver(post_delete, sender=Reservation)
+def release_reservation_seats(sender, instance, **kwargs):
+    """Free the seats of all tickets of a deleted reservation at once"""
+    if instance.ticket_places:
+        ShowSession.release_seats(instance.ticket_places)
+
+
+@receiver(pre_save, sender=PlanetariumDome)
+def remember_dome_size(sender, instance, **kwargs):
+    """Keep the size the dome had before an update"""
+    instance.previous_size = None
+    if not instance._state.adding:
+        instance.previous_size = (
+            PlanetariumDome.objects.filter(pk=instance.pk)
+            .values_list("rows", "seats_in_row")
+            .first()
+        )
+
+
+@receiver(post_save, sender=PlanetariumDome)
+def rebuild_resized_dome_occupancy(sender, instance, created, **kwargs):
+    """Remap seat maps of the sessions of a dome that changed its size"""
+    previous_size = getattr(instance, "previous_size", None)
+    if previous_size and previous_size != (
+        instance.rows,
+        instance.seats_in_row,
+    ):
+        ShowSession.rebuild_occupancy(
+            ShowSession.objects.filter(planetarium_dome=instance)
+        )
+
+
+@receiver(post_save, sender=AstronomyShow)
+def index_astronomy_show_title(sender, instance, **kwargs):
+    transaction.on_commit(lambda: title_changed(instance.pk, instance.title))
+
+
+@receiver(post_delete, sender=AstronomyShow)
+def unindex_astronomy_show_title(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: title_changed(pk))
+
+
+@receiver(m2m_changed, sender=AstronomyShow.theme.through)
+def sync_show_theme_names(sender, instance, action, reverse, pk_set, **kwargs):
+    """Keep AstronomyShow.theme_names in step with the theme relation"""
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            names = AstronomyShow.update_theme_names([instance.pk])
+            instance.theme_names = names[instance.pk]
+        return
+    if action == "pre_clear":
+        instance.cleared_show_ids = list(
+            instance.astronomy_show.values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove"):
+        AstronomyShow.update_theme_names(pk_set)
+    elif action == "post_clear":
+        AstronomyShow.update_theme_names(instance.cleared_show_ids)
+
+
+@receiver(pre_save, sender=ShowTheme)
+def remember_theme_name(sender, instance, **kwargs):
+    instance.previous_name = None
+    if not instance._state.adding:
+        instance.previous_name = (
+            ShowTheme.objects.filter(pk=instance.pk)
+            .values_list("name", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=ShowTheme)
+def rename_show_theme_names(sender, instance, created, **kwargs):
+    if not created and instance.previous_name != instance.name:
+        AstronomyShow.update_theme_names(
+            instance.astronomy_show.values_list("pk", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=ShowTheme)
+def remember_theme_shows(sender, instance, **kwargs):
+    instance.show_ids = list(
+        instance.astronomy_show.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=ShowTheme)
+def drop_show_theme_names(sender, instance, **kwargs):
+    AstronomyShow.update_theme_names(instance.show_ids)
+
+
+@receiver(post_save, sender=ShowTheme)
+@receiver(post_delete, sender=ShowTheme)
+@receiver(post_save, sender=PlanetariumDome)
+@receiver(post_delete, sender=PlanetariumDome)
+@receiver(post_save, sender=AstronomyShow)
+@receiver(post_delete, sender=AstronomyShow)
+@receiver(m2m_changed, sender=AstronomyShow.theme.through)
+@receiver(post_save, sender=ShowSession)
+@receiver(post_delete, sender=ShowSession)
+def invalidate_cached_responses(sender, **kwargs):
+    """Bump the response cache version of the changed model.
+
+    The bump on commit drops responses cached by other requests while
+    the transaction was still running.
+    """
+    if kwargs.get("action", "post_").startswith("pre_"):
+        return
+    bump_model_version(sender, RESPONSE_CACHE_NAMESPACE)
+    transaction.on_commit(
+        lambda: bump_model_version(sender, RESPONSE_CACHE_NAMESPACE)
+    )
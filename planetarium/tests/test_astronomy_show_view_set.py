@@ -2,6 +2,7 @@ import os
 import tempfile
 
 from PIL import Image
+from django.core.cache import cache, caches
 from django.test import TestCase
 
 from django.contrib.auth import get_user_model
@@ -9,6 +10,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from planetarium.cache import bump_model_version
 from planetarium.models import (
     AstronomyShow,
     ShowTheme,
@@ -22,6 +24,7 @@ from planetarium.serializers import (
 
 ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
 SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+SUGGEST_URL = reverse("planetarium:astronomyshow-suggest")
 
 
 def detail_url(astro_show_id: int):
@@ -110,6 +113,23 @@ class AuthenticateAstronomyShowTests(TestCase):
         self.assertIn(serializer_1.data, res.data["results"])
         self.assertNotIn(serializer_2.data, res.data["results"])
 
+    def test_search_ranks_title_matches_first(self):
+        in_description = sample_astronomy_show(
+            title="Night sky", description="Journey to a black hole"
+        )
+        in_title = sample_astronomy_show(
+            title="Black hole", description="Gravity at its strongest"
+        )
+        sample_astronomy_show(title="Mars", description="The red planet")
+
+        res = self.client.get(ASTRONOMY_SHOW_URL, {"q": "black hole"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [show["id"] for show in res.data["results"]],
+            [in_title.id, in_description.id],
+        )
+
     def test_filter_by_theme(self):
         astro_show_1 = sample_astronomy_show(title="title_1")
         astro_show_2 = sample_astronomy_show(title="title_2")
@@ -129,6 +149,43 @@ class AuthenticateAstronomyShowTests(TestCase):
         self.assertIn(serializer_1.data, res.data["results"])
         self.assertNotIn(serializer_2.data, res.data["results"])
 
+    def test_filter_by_all_themes(self):
+        both = sample_astronomy_show(title="both")
+        one = sample_astronomy_show(title="one")
+        theme_1 = sample_theme(name="test theme 1")
+        theme_2 = sample_theme(name="test theme 2")
+        both.theme.add(theme_1, theme_2)
+        one.theme.add(theme_1)
+        themes = f"{theme_1.id},{theme_2.id}"
+
+        res_any = self.client.get(ASTRONOMY_SHOW_URL, {"theme": themes})
+        res_all = self.client.get(
+            ASTRONOMY_SHOW_URL, {"theme": themes, "theme_match": "all"}
+        )
+
+        self.assertEqual(
+            sorted(show["id"] for show in res_any.data["results"]),
+            [both.id, one.id],
+        )
+        self.assertEqual(
+            [show["id"] for show in res_all.data["results"]], [both.id]
+        )
+
+    def test_filter_by_theme_with_invalid_match(self):
+        res = self.client.get(
+            ASTRONOMY_SHOW_URL, {"theme": "1", "theme_match": "some"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_by_invalid_theme(self):
+        for theme in ("1,", "abc"):
+            with self.subTest(theme=theme):
+                res = self.client.get(ASTRONOMY_SHOW_URL, {"theme": theme})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("theme", res.data)
+
     def test_retrieve_astro_show_details(self):
         astro_show = sample_astronomy_show()
         astro_show.theme.add(sample_theme())
@@ -152,6 +209,102 @@ class AuthenticateAstronomyShowTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
 
 
+class AstronomyShowThemeNamesTests(TestCase):
+    def setUp(self):
+        self.show = sample_astronomy_show()
+        self.stars = sample_theme(name="stars")
+        self.planets = sample_theme(name="planets")
+        self.show.theme.add(self.stars, self.planets)
+
+    def theme_names(self):
+        self.show.refresh_from_db()
+        return self.show.theme_names
+
+    def test_theme_names_follow_relation(self):
+        self.assertEqual(self.theme_names(), ["stars", "planets"])
+
+        self.show.theme.remove(self.stars)
+        self.assertEqual(self.theme_names(), ["planets"])
+
+        self.stars.astronomy_show.add(self.show)
+        self.planets.astronomy_show.clear()
+        self.assertEqual(self.theme_names(), ["stars"])
+
+    def test_theme_names_follow_rename_and_delete(self):
+        self.stars.name = "galaxies"
+        self.stars.save()
+        self.assertEqual(self.theme_names(), ["galaxies", "planets"])
+
+        self.planets.delete()
+        self.assertEqual(self.theme_names(), ["galaxies"])
+
+    def test_list_reads_theme_names_from_show_rows(self):
+        client = APIClient()
+        client.force_authenticate(
+            get_user_model().objects.create_user(
+                "astronaut@astronaut.com", "password"
+            )
+        )
+
+        with self.assertNumQueries(2):
+            res = client.get(ASTRONOMY_SHOW_URL)
+
+        self.assertEqual(res.data["results"][0]["theme"], ["stars", "planets"])
+
+
+class AstronomyShowSuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.black_hole = sample_astronomy_show(title="Black hole")
+        self.mars = sample_astronomy_show(title="Mars in colour")
+        self.marvels = sample_astronomy_show(title="Marvels of the sky")
+
+    def suggest(self, prefix, **params):
+        res = self.client.get(SUGGEST_URL, {"prefix": prefix, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [show["id"] for show in res.data]
+
+    def test_suggest_by_word_prefix(self):
+        self.assertEqual(self.suggest("MAR"), [self.mars.id, self.marvels.id])
+        self.assertEqual(self.suggest("hol"), [self.black_hole.id])
+        self.assertEqual(self.suggest("sky"), [self.marvels.id])
+        self.assertEqual(self.suggest("mar", limit=1), [self.mars.id])
+        self.assertEqual(self.suggest(""), [])
+
+    def test_suggest_without_database(self):
+        self.suggest("mar")
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.suggest("mar"), [self.mars.id, self.marvels.id]
+            )
+
+    def test_suggest_follows_changes(self):
+        self.suggest("mar")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            marathon = sample_astronomy_show(title="Marathon of stars")
+            self.mars.title = "Red planet"
+            self.mars.save()
+            self.marvels.delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.suggest("mar"), [marathon.id])
+            self.assertEqual(self.suggest("red"), [self.mars.id])
+
+    def test_suggest_rebuilds_after_other_process_change(self):
+        self.suggest("mar")
+        AstronomyShow.objects.filter(pk=self.mars.pk).update(title="Venus")
+        bump_model_version(AstronomyShow)
+
+        self.assertEqual(self.suggest("mar"), [self.marvels.id])
+
+
 class AdminAstronomyShowApiTests(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -195,6 +348,7 @@ class AdminAstronomyShowApiTests(TestCase):
 
 class MovieImageUploadTests(TestCase):
     def setUp(self):
+        caches["responses"].clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_superuser(
             "astronaut@myproject.com", "password"
@@ -0,0 +1,156 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+BASENAMES = ("showtheme", "planetariumdome", "astronomyshow", "showsession")
+
+
+@override_settings(ASYNC_READ_VIEWS=True)
+class AsyncReadOnlyViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        stars = ShowTheme.objects.create(name="stars")
+        self.show = AstronomyShow.objects.create(
+            title="Mars", description="red planet", duration=45
+        )
+        self.show.theme.add(stars)
+        self.dome = PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="Ukraine",
+            rows=10,
+            seats_in_row=6,
+        )
+        self.show_sessions = [
+            ShowSession.objects.create(
+                show_time=f"2022-06-{day:02}T14:00:00",
+                astronomy_show=self.show,
+                planetarium_dome=self.dome,
+            )
+            for day in range(1, 13)
+        ]
+        Ticket.objects.create(
+            row=1,
+            seat=2,
+            show_session=self.show_sessions[0],
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    async def assertSameAsSync(self, basename, pk=None, query=""):
+        suffix = "list" if pk is None else "detail"
+        args = [] if pk is None else [pk]
+        async_url = reverse(
+            f"planetarium:async-{basename}-{suffix}", args=args
+        )
+        sync_url = reverse(f"planetarium:{basename}-{suffix}", args=args)
+
+        res = await AsyncClient().get(
+            f"{async_url}{query}", headers=self.headers
+        )
+        expected = await sync_to_async(self.client.get)(f"{sync_url}{query}")
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res["Content-Type"], "application/json")
+        data = json.loads(res.content.replace(b"/async/", b"/"))
+        self.assertEqual(data, expected.json())
+        return data
+
+    async def test_lists_match_sync_views(self):
+        for basename in BASENAMES:
+            with self.subTest(basename):
+                await self.assertSameAsSync(basename)
+
+        data = await self.assertSameAsSync("showsession", query="?page=2")
+        self.assertEqual(data["count"], 12)
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNone(data["next"])
+
+    async def test_filters_match_sync_views(self):
+        await self.assertSameAsSync(
+            "showsession", query="?show_time_from=2022-06-10&page_size=5"
+        )
+        await self.assertSameAsSync("planetariumdome", query="?country=UK")
+
+    async def test_details_match_sync_views(self):
+        pks = {
+            "showtheme": await ShowTheme.objects.values_list(
+                "pk", flat=True
+            ).aget(),
+            "planetariumdome": self.dome.pk,
+            "astronomyshow": self.show.pk,
+            "showsession": self.show_sessions[0].pk,
+        }
+        for basename, pk in pks.items():
+            with self.subTest(basename):
+                await self.assertSameAsSync(basename, pk)
+
+    async def test_errors(self):
+        list_url = reverse("planetarium:async-showsession-list")
+        detail_url = reverse(
+            "planetarium:async-showsession-detail", args=[404]
+        )
+
+        res_anonymous = await AsyncClient().get(list_url)
+        res_page = await AsyncClient().get(
+            f"{list_url}?page=9", headers=self.headers
+        )
+        res_cursor = await AsyncClient().get(
+            f"{list_url}?pagination=cursor", headers=self.headers
+        )
+        res_missing = await AsyncClient().get(detail_url, headers=self.headers)
+        res_post = await AsyncClient().post(list_url, headers=self.headers)
+
+        self.assertEqual(
+            res_anonymous.status_code, status.HTTP_401_UNAUTHORIZED
+        )
+        self.assertIn("Bearer", res_anonymous["WWW-Authenticate"])
+        self.assertEqual(res_page.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(res_cursor.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_missing.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            res_post.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+    async def test_requests_are_throttled(self):
+        url = reverse("planetarium:async-showtheme-list")
+        for _ in range(100):
+            await AsyncClient().get(url, headers=self.headers)
+
+        res = await AsyncClient().get(url, headers=self.headers)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn("Retry-After", res)
+
+    @override_settings(ASYNC_READ_VIEWS=False)
+    async def test_disabled_by_setting(self):
+        res = await AsyncClient().get(
+            reverse("planetarium:async-showtheme-list"), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
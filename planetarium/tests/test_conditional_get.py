@@ -0,0 +1,154 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    SeatHold,
+    ShowSession,
+    Ticket,
+)
+
+
+def detail_url(show_session_id):
+    return reverse("planetarium:showsession-detail", args=[show_session_id])
+
+
+def seat_map_url(show_session_id):
+    return reverse("planetarium:showsession-seat-map", args=[show_session_id])
+
+
+class ConditionalShowSessionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.dome = PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=6,
+        )
+        self.show_session = ShowSession.objects.create(
+            show_time="2022-06-02T14:00:00",
+            astronomy_show=AstronomyShow.objects.create(
+                title="Mars", description="red planet", duration=45
+            ),
+            planetarium_dome=self.dome,
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    def get(self, url, etag=None):
+        if etag is None:
+            return self.client.get(url)
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def add_ticket(self, seat):
+        return Ticket.objects.create(
+            row=1,
+            seat=seat,
+            show_session=self.show_session,
+            reservation=self.reservation,
+        )
+
+    def test_unchanged_session_is_not_modified(self):
+        etag = self.get(detail_url(self.show_session.id))["ETag"]
+
+        with self.assertNumQueries(1):
+            res = self.get(detail_url(self.show_session.id), etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+        self.assertEqual(res.content, b"")
+
+    def test_if_none_match_comparison(self):
+        etag = self.get(detail_url(self.show_session.id))["ETag"]
+
+        for if_none_match in (f'"other", W/{etag}', "*"):
+            res = self.get(detail_url(self.show_session.id), if_none_match)
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        res = self.get(detail_url(self.show_session.id), '"other"')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_ticket_insert_and_delete_change_etag(self):
+        etags = [self.get(detail_url(self.show_session.id))["ETag"]]
+
+        ticket = self.add_ticket(1)
+        res = self.get(detail_url(self.show_session.id), etags[0])
+        etags.append(res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["seat_map"], "gAAAAAAAAAA=")
+
+        ticket.delete()
+        res = self.get(detail_url(self.show_session.id), etags[1])
+        etags.append(res["ETag"])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["seat_map"], "AAAAAAAAAAA=")
+
+        self.assertEqual(len(set(etags)), 3)
+
+    def test_embedded_dome_change_changes_etag(self):
+        etag = self.get(detail_url(self.show_session.id))["ETag"]
+
+        self.dome.name = "observatory"
+        self.dome.save()
+        res = self.get(detail_url(self.show_session.id), etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["planetarium_dome"]["name"], "observatory")
+
+    def test_seat_map_follows_holds(self):
+        etag = self.get(seat_map_url(self.show_session.id))["ETag"]
+        self.assertEqual(
+            self.get(seat_map_url(self.show_session.id), etag).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        SeatHold.objects.hold_seats(
+            self.user, self.show_session, [(2, 2)], timedelta(minutes=5)
+        )
+        res = self.get(seat_map_url(self.show_session.id), etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        held_etag = res["ETag"]
+
+        SeatHold.objects.update(expires_at=timezone.now())
+        res = self.get(seat_map_url(self.show_session.id), held_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["ETag"], etag)
+
+    def test_representation_inputs_change_etag(self):
+        url = seat_map_url(self.show_session.id)
+        etag = self.get(url)["ETag"]
+
+        res_rle = self.client.get(
+            url, {"encoding": "rle"}, HTTP_IF_NONE_MATCH=etag
+        )
+        res_html = self.client.get(
+            url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res_rle.status_code, status.HTTP_200_OK)
+        self.assertEqual(res_rle.data["encoding"], "rle")
+        self.assertNotEqual(res_rle["ETag"], etag)
+        self.assertEqual(res_html.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res_html["ETag"], etag)
+
+    def test_unknown_session(self):
+        res = self.get(detail_url(404), "*")
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn("ETag", res)
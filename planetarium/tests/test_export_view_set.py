@@ -0,0 +1,154 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.exports import TICKET_EXPORT_FIELDS, export_rows
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+
+TICKET_EXPORT_URL = reverse("planetarium:export-tickets")
+RESERVATION_EXPORT_URL = reverse("planetarium:export-reservations")
+
+
+def sample_show_session(**params):
+    defaults = {
+        "show_time": "2022-06-02T14:00:00",
+        "astronomy_show": AstronomyShow.objects.create(
+            title="test title", description="test description", duration=45
+        ),
+        "planetarium_dome": PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=6,
+        ),
+    }
+    defaults.update(params)
+    return ShowSession.objects.create(**defaults)
+
+
+class ExportViewSetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.june = sample_show_session(show_time="2022-06-02T14:00:00")
+        self.july = sample_show_session(show_time="2022-07-02T14:00:00")
+        self.reservation = Reservation.objects.create(user=self.user)
+        for show_session, seat in ((self.june, 1), (self.june, 2)):
+            Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=show_session,
+                reservation=self.reservation,
+            )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.july,
+            reservation=Reservation.objects.create(user=self.user),
+        )
+
+    def export(self, url, headers=None, **params):
+        res = self.client.get(url, params, headers=headers)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        return res, b"".join(res.streaming_content).decode()
+
+    def test_export_tickets_as_ndjson(self):
+        res, content = self.export(
+            TICKET_EXPORT_URL, show_time_to="2022-07-01"
+        )
+        rows = [json.loads(line) for line in content.splitlines()]
+
+        self.assertEqual(res["Content-Type"], "application/x-ndjson")
+        self.assertEqual([row["seat"] for row in rows], [1, 2])
+        self.assertEqual(rows[0]["show_time"], "2022-06-02T14:00:00")
+        self.assertEqual(rows[0]["user"], "admin@admin.com")
+        self.assertEqual(rows[0]["reservation"], self.reservation.id)
+
+    def test_export_reservations_as_csv(self):
+        res, content = self.export(
+            RESERVATION_EXPORT_URL,
+            export_format="csv",
+            planetarium_dome=self.june.planetarium_dome_id,
+        )
+        lines = content.splitlines()
+
+        self.assertEqual(res["Content-Type"], "text/csv")
+        self.assertIn("reservations.csv", res["Content-Disposition"])
+        self.assertEqual(lines[0], "id,created_at,user,tickets")
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f"{self.reservation.id},"))
+        self.assertTrue(lines[1].endswith(",admin@admin.com,2"))
+
+    def test_export_in_accepted_format(self):
+        for media_type, lines in (
+            ("text/csv", 4),
+            ("application/x-ndjson", 3),
+        ):
+            with self.subTest(media_type=media_type):
+                res, content = self.export(
+                    TICKET_EXPORT_URL, headers={"Accept": media_type}
+                )
+
+                self.assertEqual(res["Content-Type"], media_type)
+                self.assertEqual(len(content.splitlines()), lines)
+
+    def test_export_error_with_accept_header(self):
+        res = self.client.get(
+            TICKET_EXPORT_URL,
+            {"planetarium_dome": "first"},
+            headers={"Accept": "text/csv"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertIn("planetarium_dome", res.json())
+
+    def test_export_in_chunks(self):
+        chunks = list(
+            export_rows(
+                Ticket.objects.order_by("id"),
+                TICKET_EXPORT_FIELDS,
+                "csv",
+                chunk_size=2,
+            )
+        )
+
+        self.assertEqual([chunk.count(b"\n") for chunk in chunks], [2, 2])
+
+    def test_export_invalid_params(self):
+        res_format = self.client.get(
+            TICKET_EXPORT_URL, {"export_format": "xml"}
+        )
+        res_dome = self.client.get(
+            TICKET_EXPORT_URL, {"planetarium_dome": "first"}
+        )
+
+        self.assertEqual(res_format.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res_dome.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_forbidden_for_users(self):
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "astronaut@astronaut.com", "password"
+            )
+        )
+
+        res = self.client.get(TICKET_EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
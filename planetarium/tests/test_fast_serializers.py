@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from planetarium.fast_serializers import (
+    AstronomyShowListValuesSerializer,
+    ShowSessionListValuesSerializer,
+    TicketListValuesSerializer,
+)
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+
+class ValuesSerializerTests(TestCase):
+    """The values serializers must render exactly like their serializers"""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        themes = [ShowTheme.objects.create(name=name) for name in "abc"]
+        dome = PlanetariumDome.objects.create(
+            name="dome",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=8,
+        )
+        reservation = Reservation.objects.create(user=user)
+        for number in range(4):
+            show = AstronomyShow.objects.create(
+                title=f"show {number} «ñ»",
+                description='with "quotes" and\nnew lines',
+                duration=40 + number,
+                image=f"uploads/astronomy_show/show-{number}.jpg"
+                if number % 2
+                else None,
+            )
+            show.theme.add(*themes[:number])
+            show_session = ShowSession.objects.create(
+                show_time=f"2022-06-0{number + 1}T14:{number}0:00",
+                astronomy_show=show,
+                planetarium_dome=dome,
+            )
+            for seat in range(1, number + 1):
+                Ticket.objects.create(
+                    row=number + 1,
+                    seat=seat,
+                    show_session=show_session,
+                    reservation=reservation,
+                )
+
+    def assertSameRendering(self, values_serializer_class, queryset):
+        for context in (
+            {},
+            {"request": APIRequestFactory().get("/")},
+        ):
+            serializer_class = values_serializer_class.serializer_class
+            expected = JSONRenderer().render(
+                serializer_class(queryset, many=True, context=context).data
+            )
+            values_serializer = values_serializer_class(context=context)
+            rendered = JSONRenderer().render(
+                values_serializer.to_representation(
+                    values_serializer.values(queryset)
+                )
+            )
+            self.assertEqual(rendered, expected)
+
+    def test_show_session_list(self):
+        self.assertSameRendering(
+            ShowSessionListValuesSerializer,
+            ShowSession.objects.select_related(
+                "astronomy_show", "planetarium_dome"
+            )
+            .annotate(
+                tickets_available=F("planetarium_dome__rows")
+                * F("planetarium_dome__seats_in_row")
+                - F("tickets_sold")
+            )
+            .order_by("id"),
+        )
+
+    def test_astronomy_show_list(self):
+        self.assertSameRendering(
+            AstronomyShowListValuesSerializer,
+            AstronomyShow.objects.order_by("id"),
+        )
+
+    def test_ticket_list(self):
+        self.assertSameRendering(
+            TicketListValuesSerializer,
+            Ticket.objects.select_related(
+                "show_session__astronomy_show",
+                "show_session__planetarium_dome",
+                "reservation__user",
+            ).order_by("id"),
+        )
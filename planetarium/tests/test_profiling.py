@@ -0,0 +1,125 @@
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.models import ShowTheme
+from planetarium.profiling import (
+    PROFILE_ID_HEADER,
+    ProfilerMiddleware,
+    profiles,
+)
+
+PROFILE_URL = reverse("planetarium:profile-list")
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+
+
+def flamegraph_url(profile_id):
+    return reverse("planetarium:profile-flamegraph", args=[profile_id])
+
+
+@override_settings(PROFILER_INTERVAL=0.0005)
+class ProfilerMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        profiles.clear()
+        self.client = APIClient()
+        self.staff = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        ShowTheme.objects.bulk_create(
+            ShowTheme(name=f"theme {number}") for number in range(20)
+        )
+
+    def authenticate(self, user):
+        token = RefreshToken.for_user(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_staff_header_profiles_request(self):
+        self.authenticate(self.staff)
+
+        res = self.client.get(SHOW_THEME_URL, HTTP_X_PROFILE="1")
+        profile_id = res[PROFILE_ID_HEADER]
+        res_list = self.client.get(PROFILE_URL)
+        res_flamegraph = self.client.get(flamegraph_url(profile_id))
+
+        profile = res_list.data[0]
+        self.assertEqual(profile["id"], int(profile_id))
+        self.assertEqual(profile["path"], SHOW_THEME_URL)
+        self.assertEqual(profile["status"], status.HTTP_200_OK)
+        self.assertGreaterEqual(profile["sql_count"], 2)
+        self.assertGreater(profile["wall_ms"], profile["sql_ms"])
+        self.assertNotIn("stacks", profile)
+
+        self.assertEqual(res_flamegraph.status_code, status.HTTP_200_OK)
+        lines = res_flamegraph.content.decode().splitlines()
+        self.assertEqual(
+            sum(int(line.rsplit(" ", 1)[1]) for line in lines),
+            profile["samples"],
+        )
+
+    def test_header_of_user_is_ignored(self):
+        self.authenticate(self.user)
+
+        res = self.client.get(SHOW_THEME_URL, HTTP_X_PROFILE="1")
+
+        self.assertNotIn(PROFILE_ID_HEADER, res)
+        self.assertEqual(len(profiles), 0)
+
+    @override_settings(PROFILER_SAMPLE_RATE=1.0)
+    def test_sample_rate_profiles_request(self):
+        self.authenticate(self.user)
+
+        res = self.client.get(SHOW_THEME_URL)
+
+        self.assertIn(PROFILE_ID_HEADER, res)
+        self.assertEqual(len(profiles), 1)
+
+    def test_middleware_keeps_async_chain_async(self):
+        async def get_response(request):
+            pass
+
+        self.assertTrue(iscoroutinefunction(ProfilerMiddleware(get_response)))
+        self.assertFalse(iscoroutinefunction(ProfilerMiddleware(print)))
+
+    async def test_staff_header_profiles_async_request(self):
+        token = RefreshToken.for_user(self.staff).access_token
+        headers = {"Authorization": f"Bearer {token}"}
+        client = AsyncClient()
+
+        res_profiled = await client.get(
+            SHOW_THEME_URL, headers={**headers, "X-Profile": "1"}
+        )
+        res = await client.get(SHOW_THEME_URL, headers=headers)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn(PROFILE_ID_HEADER, res)
+        self.assertEqual(res_profiled.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(
+            res_profiled[PROFILE_ID_HEADER], str(profiles[0]["id"])
+        )
+        # Connections are per thread, so the queries were only timed if
+        # the view ran in the profiled thread
+        self.assertGreaterEqual(profiles[0]["sql_count"], 2)
+
+    def test_profiles_forbidden_for_users(self):
+        self.authenticate(self.user)
+
+        res = self.client.get(PROFILE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unknown_profile(self):
+        self.authenticate(self.staff)
+
+        res = self.client.get(flamegraph_url(404))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
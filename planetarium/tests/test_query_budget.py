@@ -0,0 +1,338 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ReservationRequest,
+    SeatHold,
+    ShowSession,
+    ShowTheme,
+    Ticket,
+)
+
+DATASET_SIZES = (1, 4, 9)
+
+
+def sample_astronomy_show(**params):
+    defaults = {
+        "title": "test title",
+        "description": "test description",
+        "duration": 45,
+    }
+    defaults.update(params)
+    return AstronomyShow.objects.create(**defaults)
+
+
+def sample_planetarium_dome(**params):
+    defaults = {
+        "name": "planetarium",
+        "address": "any address",
+        "city_state_province": "any province",
+        "country": "any country",
+        "rows": 30,
+        "seats_in_row": 30,
+    }
+    defaults.update(params)
+    return PlanetariumDome.objects.create(**defaults)
+
+
+def sample_show_session(**params):
+    defaults = {
+        "show_time": "2022-06-02T14:00:00",
+        "astronomy_show": sample_astronomy_show(),
+        "planetarium_dome": sample_planetarium_dome(),
+    }
+    defaults.update(params)
+    return ShowSession.objects.create(**defaults)
+
+
+class QueryBudgetTestCase(TestCase):
+    """Check that endpoints run the same queries for any amount of data.
+
+    Every check seeds DATASET_SIZES rows in steps and repeats the request
+    after each step. A differing number of queries fails the test with
+    the captured SQL of both runs.
+    """
+
+    def setUp(self):
+        cache.clear()
+        caches["responses"].clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+
+    def assertConstantQueries(self, request, seed=None):
+        runs = []
+        seeded = 0
+        for size in DATASET_SIZES:
+            if seed is not None:
+                for number in range(seeded, size):
+                    seed(number)
+                seeded = size
+            with CaptureQueriesContext(connection) as context:
+                response = request(size)
+            self.assertLess(response.status_code, 300, response.data)
+            runs.append((size, context.captured_queries))
+
+        first_size, first_queries = runs[0]
+        for size, queries in runs[1:]:
+            if len(queries) != len(first_queries):
+                self.fail(
+                    f"{len(first_queries)} queries with {first_size} rows, "
+                    f"{len(queries)} with {size} rows:\n"
+                    f"{self.format_queries(first_queries)}\n---\n"
+                    f"{self.format_queries(queries)}"
+                )
+
+    @staticmethod
+    def format_queries(queries):
+        return "\n".join(
+            f"{number}. {query['sql']}"
+            for number, query in enumerate(queries, start=1)
+        )
+
+    def get(self, url, data=None):
+        return lambda size: self.client.get(url, data)
+
+
+class CatalogueQueryBudgetTests(QueryBudgetTestCase):
+    def test_show_theme_list(self):
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:showtheme-list")),
+            lambda number: ShowTheme.objects.create(name=f"theme {number}"),
+        )
+
+    def test_planetarium_dome_list(self):
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:planetariumdome-list")),
+            lambda number: sample_planetarium_dome(name=f"dome {number}"),
+        )
+
+    def test_astronomy_show_list(self):
+        themes = [ShowTheme.objects.create(name=name) for name in "ab"]
+
+        def seed(number):
+            sample_astronomy_show(title=f"show {number}").theme.add(*themes)
+
+        self.assertConstantQueries(
+            self.get(
+                reverse("planetarium:astronomyshow-list"),
+                {"theme": f"{themes[0].id},{themes[1].id}"},
+            ),
+            seed,
+        )
+
+    def test_astronomy_show_retrieve(self):
+        show = sample_astronomy_show()
+
+        def seed(number):
+            show.theme.add(ShowTheme.objects.create(name=f"theme {number}"))
+
+        self.assertConstantQueries(
+            self.get(
+                reverse("planetarium:astronomyshow-detail", args=[show.id])
+            ),
+            seed,
+        )
+
+
+class ShowSessionQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.show_session = sample_show_session()
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    def add_ticket(self, number, show_session=None):
+        Ticket.objects.create(
+            row=number // 30 + 1,
+            seat=number % 30 + 1,
+            show_session=show_session or self.show_session,
+            reservation=self.reservation,
+        )
+
+    @override_settings(
+        SHOW_SESSION_LIST_CACHE={
+            "SOFT_TTL": 0,
+            "HARD_TTL": 300,
+            "LOCK_TIMEOUT": 10,
+            "BACKGROUND_REFRESH": False,
+        }
+    )
+    def test_show_session_list(self):
+        def seed(number):
+            self.add_ticket(0, sample_show_session())
+
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:showsession-list")), seed
+        )
+
+    def test_show_session_retrieve(self):
+        self.assertConstantQueries(
+            self.get(
+                reverse(
+                    "planetarium:showsession-detail",
+                    args=[self.show_session.id],
+                )
+            ),
+            self.add_ticket,
+        )
+
+    def test_show_session_seat_map(self):
+        def seed(number):
+            self.add_ticket(number)
+            SeatHold.objects.create(
+                row=30,
+                seat=number + 1,
+                show_session=self.show_session,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=5),
+            )
+
+        self.assertConstantQueries(
+            self.get(
+                reverse(
+                    "planetarium:showsession-seat-map",
+                    args=[self.show_session.id],
+                )
+            ),
+            seed,
+        )
+
+    def test_show_session_allocate(self):
+        self.user.is_staff = True
+        self.user.save()
+        url = reverse(
+            "planetarium:showsession-allocate", args=[self.show_session.id]
+        )
+        self.assertConstantQueries(
+            lambda size: self.client.post(url, {"party_size": size}),
+            self.add_ticket,
+        )
+
+
+class ReservationQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.show_session = sample_show_session()
+
+    def add_reservation(self, number):
+        reservation = Reservation.objects.create(user=self.user)
+        for seat in (1, 2):
+            Ticket.objects.create(
+                row=number + 1,
+                seat=seat,
+                show_session=sample_show_session(),
+                reservation=reservation,
+            )
+
+    def test_reservation_list(self):
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:reservation-list")),
+            self.add_reservation,
+        )
+
+    def test_reservation_list_with_cursor(self):
+        self.assertConstantQueries(
+            self.get(
+                reverse("planetarium:reservation-list"),
+                {"pagination": "cursor"},
+            ),
+            self.add_reservation,
+        )
+
+    def test_reservation_retrieve(self):
+        reservation = Reservation.objects.create(user=self.user)
+
+        def seed(number):
+            Ticket.objects.create(
+                row=1,
+                seat=1,
+                show_session=sample_show_session(),
+                reservation=reservation,
+            )
+
+        self.assertConstantQueries(
+            self.get(
+                reverse("planetarium:reservation-detail", args=[reservation.id])
+            ),
+            seed,
+        )
+
+    def test_reservation_create(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        def request(size):
+            tickets = [
+                {"row": size, "seat": seat, "show_session": self.show_session.id}
+                for seat in range(1, size + 1)
+            ]
+            return self.client.post(
+                reverse("planetarium:reservation-list"),
+                {"tickets": tickets},
+                format="json",
+            )
+
+        self.assertConstantQueries(request)
+
+    def test_seat_hold_list(self):
+        def seed(number):
+            SeatHold.objects.create(
+                row=1,
+                seat=number + 1,
+                show_session=self.show_session,
+                user=self.user,
+                expires_at=timezone.now() + timedelta(minutes=5),
+            )
+
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:seathold-list")), seed
+        )
+
+    def test_seat_hold_create(self):
+        self.user.is_staff = True
+        self.user.save()
+
+        def request(size):
+            return self.client.post(
+                reverse("planetarium:seathold-list"),
+                {
+                    "show_session": self.show_session.id,
+                    "seats": [
+                        {"row": size, "seat": seat}
+                        for seat in range(1, size + 1)
+                    ],
+                },
+                format="json",
+            )
+
+        self.assertConstantQueries(request)
+
+    def test_reservation_request_list(self):
+        def seed(number):
+            ReservationRequest.objects.create(
+                show_session=sample_show_session(),
+                user=self.user,
+                seats=[[1, number + 1]],
+            )
+
+        self.assertConstantQueries(
+            self.get(reverse("planetarium:reservationrequest-list")), seed
+        )
+
+
+class UserQueryBudgetTests(QueryBudgetTestCase):
+    def test_manage_user(self):
+        self.assertConstantQueries(self.get(reverse("user:manage")))
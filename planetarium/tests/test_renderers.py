@@ -0,0 +1,76 @@
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.renderers import ORJSONParser, ORJSONRenderer
+
+
+class ORJSONRendererTests(TestCase):
+    def test_renders_like_drf(self):
+        data = ReturnDict(
+            {
+                "results": ReturnList(
+                    [{"id": 1, "title": "«Mars»\u2028", "price": Decimal("2")}],
+                    serializer=None,
+                ),
+                "label": gettext_lazy("Mars"),
+                1: None,
+            },
+            serializer=None,
+        )
+
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indented_output_falls_back_to_drf(self):
+        data = {"id": 1}
+        media_type = "application/json; indent=4"
+
+        self.assertEqual(
+            ORJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type),
+        )
+
+    def test_parse(self):
+        stream = BytesIO('{"title": "«Mars»", "seats": [[1, 2]]}'.encode())
+
+        self.assertEqual(
+            ORJSONParser().parse(stream),
+            {"title": "«Mars»", "seats": [[1, 2]]},
+        )
+
+    def test_parse_error(self):
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b"{'title': NaN}"))
+
+
+class BenchmarkRenderersCommandTests(TestCase):
+    def test_benchmark_renderers(self):
+        ShowSession.objects.create(
+            show_time="2022-06-02T14:00:00",
+            astronomy_show=AstronomyShow.objects.create(
+                title="Mars", description="red planet", duration=45
+            ),
+            planetarium_dome=PlanetariumDome.objects.create(
+                name="dome",
+                address="any address",
+                city_state_province="any province",
+                country="any country",
+                rows=10,
+                seats_in_row=8,
+            ),
+        )
+        out = StringIO()
+
+        call_command("benchmark_renderers", "--repeat", "2", stdout=out)
+
+        self.assertIn("show_session", out.getvalue())
+        self.assertIn("orjson", out.getvalue())
@@ -0,0 +1,184 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    ReservationRequest,
+    Ticket,
+)
+
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+def sample_show_session(**params):
+    defaults = {
+        "show_time": "2022-06-02T14:00:00",
+        "astronomy_show": AstronomyShow.objects.create(
+            title="test title", description="test description", duration=45
+        ),
+        "planetarium_dome": PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=6,
+        ),
+    }
+    defaults.update(params)
+    return ShowSession.objects.create(**defaults)
+
+
+class QueuedReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session(queued_reservations=True)
+
+    def reserve(self, *places, show_session=None):
+        show_session = show_session or self.show_session
+        return self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": row, "seat": seat, "show_session": show_session.id}
+                    for row, seat in places
+                ]
+            },
+            format="json",
+        )
+
+    def test_reservation_is_queued(self):
+        res = self.reserve((1, 1), (1, 2))
+
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data["status"], "pending")
+        self.assertEqual(res.data["seats"], [[1, 1], [1, 2]])
+        self.assertEqual(
+            res["Location"],
+            reverse(
+                "planetarium:reservationrequest-detail", args=[res.data["id"]]
+            ),
+        )
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_worker_processes_queue_in_order(self):
+        first = self.reserve((1, 1), (1, 2))
+        second = self.reserve((1, 2), (1, 3))
+        third = self.reserve((2, 1))
+
+        call_command("process_reservation_queue", once=True, stdout=StringIO())
+
+        statuses = dict(ReservationRequest.objects.values_list("id", "status"))
+        self.assertEqual(statuses[first.data["id"]], "done")
+        self.assertEqual(statuses[second.data["id"]], "failed")
+        self.assertEqual(statuses[third.data["id"]], "done")
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 3)
+        self.assertTrue(self.show_session.get_seat_map().is_taken(2, 1))
+
+    def process_queue(self):
+        call_command("process_reservation_queue", once=True, stdout=StringIO())
+        return dict(ReservationRequest.objects.values_list("id", "status"))
+
+    def test_seats_outside_of_resized_dome_fail(self):
+        outside = self.reserve((5, 5))
+        inside = self.reserve((1, 1))
+        dome = self.show_session.planetarium_dome
+        dome.rows = 3
+        dome.save()
+
+        statuses = self.process_queue()
+
+        self.assertEqual(statuses[outside.data["id"]], "failed")
+        self.assertEqual(statuses[inside.data["id"]], "done")
+        self.assertEqual(
+            ReservationRequest.objects.get(id=outside.data["id"]).errors,
+            [
+                "row: 5, seat: 5 is outside of the dome "
+                f"of show session {self.show_session.id}"
+            ],
+        )
+
+    def test_seat_map_out_of_sync_does_not_stall_queue(self):
+        first = self.reserve((1, 1))
+        second = self.reserve((1, 2))
+        self.process_queue()
+        ShowSession.objects.filter(pk=self.show_session.pk).update(
+            seat_map=bytes(8)
+        )
+        stale = self.reserve((1, 1))
+        other = self.reserve((2, 2))
+
+        with self.assertLogs("planetarium.models", "ERROR"):
+            statuses = self.process_queue()
+
+        self.assertEqual(statuses[first.data["id"]], "done")
+        self.assertEqual(statuses[second.data["id"]], "done")
+        self.assertEqual(statuses[stale.data["id"]], "failed")
+        self.assertEqual(
+            ReservationRequest.objects.get(id=stale.data["id"]).errors,
+            [
+                "row: 1, seat: 1 is already taken "
+                f"for show session {self.show_session.id}"
+            ],
+        )
+        self.assertEqual(statuses[other.data["id"]], "done")
+        self.assertEqual(Ticket.objects.count(), 3)
+        self.show_session.refresh_from_db()
+        self.assertTrue(self.show_session.get_seat_map().is_taken(2, 2))
+
+    def test_poll_reservation_request(self):
+        request_id = self.reserve((1, 1)).data["id"]
+        call_command("process_reservation_queue", once=True, stdout=StringIO())
+
+        res = self.client.get(
+            reverse(
+                "planetarium:reservationrequest-detail", args=[request_id]
+            ),
+            {"wait": 5},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["status"], "done")
+        self.assertIsNotNone(res.data["reservation"])
+
+    def test_queued_reservation_with_other_session_tickets(self):
+        other_session = sample_show_session()
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {
+                        "row": 1,
+                        "seat": 1,
+                        "show_session": self.show_session.id,
+                    },
+                    {"row": 1, "seat": 1, "show_session": other_session.id},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ReservationRequest.objects.exists())
+
+    def test_not_queued_session_reserves_immediately(self):
+        res = self.reserve((1, 1), show_session=sample_show_session())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 1)
@@ -1,17 +1,27 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APIClient
 
 from planetarium.models import (
+    IdempotencyKey,
     Reservation,
     Ticket,
     PlanetariumDome,
     ShowSession,
     AstronomyShow,
 )
+from pagination import EstimatedCountPaginator
 from planetarium.serializers import (
     ReservationListSerializer,
     ReservationSerializer,
@@ -92,6 +102,12 @@ class AuthenticateReservationTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["results"][0], serializer.data)
 
+    def test_reservation_list_reports_exact_count(self):
+        res = self.client.get(RESERVATION_URL)
+
+        self.assertEqual(res.data["count"], 1)
+        self.assertFalse(res.data["count_is_estimated"])
+
     def test_retrieve_reservation_details(self):
         self.reservation.tickets.add(self.ticket)
 
@@ -110,3 +126,240 @@ class AuthenticateReservationTests(TestCase):
         res = self.client.post(RESERVATION_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdminReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def reservation_payload(self, *places):
+        return {
+            "tickets": [
+                {
+                    "row": row,
+                    "seat": seat,
+                    "show_session": self.show_session.id,
+                }
+                for row, seat in places
+            ]
+        }
+
+    def test_create_reservation(self):
+        payload = self.reservation_payload((1, 1), (1, 2), (2, 1))
+
+        res = self.client.post(RESERVATION_URL, payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        reservation = Reservation.objects.get(id=res.data["id"])
+        self.assertEqual(reservation.user, self.user)
+        self.assertEqual(reservation.tickets.count(), 3)
+
+    def test_create_reservation_queries_do_not_grow_with_tickets(self):
+        with CaptureQueriesContext(connection) as single_ticket:
+            self.client.post(
+                RESERVATION_URL,
+                self.reservation_payload((1, 1)),
+                format="json",
+            )
+        with CaptureQueriesContext(connection) as group_booking:
+            self.client.post(
+                RESERVATION_URL,
+                self.reservation_payload(*[(5, seat) for seat in range(1, 7)]),
+                format="json",
+            )
+
+        self.assertEqual(len(group_booking), len(single_ticket))
+
+    def test_create_reservation_with_taken_seat(self):
+        self.client.post(
+            RESERVATION_URL, self.reservation_payload((1, 1)), format="json"
+        )
+
+        res = self.client.post(
+            RESERVATION_URL,
+            self.reservation_payload((1, 2), (1, 1)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["collisions"],
+            [{"show_session": self.show_session.id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(
+            [
+                (place["row"], place["seat"])
+                for place in res.data["free_nearby"]
+            ],
+            [(1, 2), (1, 3), (2, 1), (2, 2), (2, 3)],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_create_reservation_with_seat_taken_on_insert(self):
+        self.client.post(
+            RESERVATION_URL, self.reservation_payload((1, 1)), format="json"
+        )
+        ShowSession.objects.update(seat_map=b"")
+
+        res = self.client.post(
+            RESERVATION_URL,
+            self.reservation_payload((1, 2), (1, 1), (1, 3)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            res.data["collisions"],
+            [{"show_session": self.show_session.id, "row": 1, "seat": 1}],
+        )
+        self.assertEqual(Ticket.objects.count(), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 1)
+
+    def test_create_reservation_with_repeated_seat(self):
+        res = self.client.post(
+            RESERVATION_URL,
+            self.reservation_payload((1, 1), (1, 1)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_create_reservation_with_seat_out_of_range(self):
+        res = self.client.post(
+            RESERVATION_URL,
+            self.reservation_payload((1, 1), (11, 1)),
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"][1]["row"][0],
+            "row number must be in available range: (1, rows): (1, 10)",
+        )
+
+
+class IdempotentReservationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+        self.payload = {
+            "tickets": [
+                {"row": 1, "seat": 1, "show_session": self.show_session.id}
+            ]
+        }
+
+    def post(self, payload, key):
+        return self.client.post(
+            RESERVATION_URL,
+            payload,
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_response(self):
+        res = self.post(self.payload, "key-1")
+        retry = self.post(self.payload, "key-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, res.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Reservation.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_retry_with_another_payload(self):
+        self.post(self.payload, "key-1")
+        self.payload["tickets"][0]["seat"] = 2
+
+        res = self.post(self.payload, "key-1")
+
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Ticket.objects.count(), 1)
+
+    def test_failed_request_is_not_stored(self):
+        self.payload["tickets"][0]["seat"] = 100
+        self.post(self.payload, "key-1")
+        self.payload["tickets"][0]["seat"] = 1
+
+        res = self.post(self.payload, "key-1")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_expired_key_is_reused(self):
+        self.post(self.payload, "key-1")
+        IdempotencyKey.objects.update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.payload["tickets"][0]["seat"] = 2
+
+        res = self.post(self.payload, "key-1")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Ticket.objects.count(), 2)
+
+    def test_purge_expired_keys(self):
+        self.post(self.payload, "key-1")
+        self.payload["tickets"][0]["seat"] = 2
+        self.post(self.payload, "key-2")
+        IdempotencyKey.objects.filter(key="key-1").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        call_command("purge_idempotency_keys", stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)),
+            ["key-2"],
+        )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        Reservation.objects.bulk_create(
+            Reservation(user=user) for _ in range(5)
+        )
+        self.queryset = Reservation.objects.order_by("id")
+
+    def paginator(self, threshold):
+        paginator = EstimatedCountPaginator(self.queryset, 2)
+        paginator.exact_count_threshold = threshold
+        return paginator
+
+    def test_exact_count_below_threshold(self):
+        paginator = self.paginator(threshold=5)
+
+        self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.count_is_estimated)
+
+    def test_estimate_above_threshold(self):
+        paginator = self.paginator(threshold=3)
+
+        with mock.patch.object(
+            EstimatedCountPaginator, "estimate_count", return_value=1000
+        ):
+            self.assertEqual(paginator.count, 1000)
+        self.assertTrue(paginator.count_is_estimated)
+        self.assertEqual(len(paginator.page(2).object_list), 2)
+
+    def test_exact_count_without_estimate(self):
+        paginator = self.paginator(threshold=3)
+
+        with mock.patch.object(
+            EstimatedCountPaginator, "estimate_count", return_value=None
+        ):
+            self.assertEqual(paginator.count, 5)
+        self.assertFalse(paginator.count_is_estimated)
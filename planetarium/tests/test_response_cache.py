@@ -0,0 +1,96 @@
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import AstronomyShow, ShowTheme
+from planetarium.response_cache import RESPONSE_CACHE_HEADER
+
+SHOW_THEME_URL = reverse("planetarium:showtheme-list")
+ASTRONOMY_SHOW_URL = reverse("planetarium:astronomyshow-list")
+
+
+class VersionedResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.theme = ShowTheme.objects.create(name="stars")
+
+    def get(self, url, data=None):
+        res = self.client.get(f"{url}?{data}" if data else url)
+        return res[RESPONSE_CACHE_HEADER], res.data
+
+    def test_repeated_request_is_served_from_cache(self):
+        self.assertEqual(self.get(SHOW_THEME_URL)[0], "MISS")
+
+        with self.assertNumQueries(0):
+            state, data = self.get(SHOW_THEME_URL)
+
+        self.assertEqual(state, "HIT")
+        self.assertEqual(
+            data["results"], [{"id": self.theme.id, "name": "stars"}]
+        )
+
+    def test_query_params_are_normalized(self):
+        self.get(SHOW_THEME_URL, "page_size=5&page=1")
+
+        self.assertEqual(
+            self.get(SHOW_THEME_URL, "page=1&page_size=5")[0], "HIT"
+        )
+        self.assertEqual(self.get(SHOW_THEME_URL, "page_size=6")[0], "MISS")
+
+    def test_save_and_delete_invalidate(self):
+        self.get(SHOW_THEME_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            planets = ShowTheme.objects.create(name="planets")
+        state, data = self.get(SHOW_THEME_URL)
+        self.assertEqual(state, "MISS")
+        self.assertEqual(data["count"], 2)
+
+        planets.delete()
+        self.assertEqual(self.get(SHOW_THEME_URL)[1]["count"], 1)
+
+    def test_theme_changes_invalidate_astronomy_shows(self):
+        show = AstronomyShow.objects.create(
+            title="Mars", description="red planet", duration=45
+        )
+        self.get(ASTRONOMY_SHOW_URL)
+
+        show.theme.add(self.theme)
+        self.assertEqual(
+            self.get(ASTRONOMY_SHOW_URL)[1]["results"][0]["theme"], ["stars"]
+        )
+
+        self.theme.name = "galaxies"
+        self.theme.save()
+        self.assertEqual(
+            self.get(ASTRONOMY_SHOW_URL)[1]["results"][0]["theme"],
+            ["galaxies"],
+        )
+
+    def test_file_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            file_caches = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                    "FileBasedCache",
+                    "LOCATION": location,
+                },
+                "responses": {
+                    "BACKEND": "django.core.cache.backends.filebased."
+                    "FileBasedCache",
+                    "LOCATION": location,
+                },
+            }
+            with override_settings(CACHES=file_caches):
+                self.assertEqual(self.get(SHOW_THEME_URL)[0], "MISS")
+                self.assertEqual(self.get(SHOW_THEME_URL)[0], "HIT")
+                caches["responses"].clear()
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    Reservation,
+    ShowSession,
+    Ticket,
+)
+from planetarium.seat_events import CacheBroker, get_broker
+
+SEAT_EVENTS = {
+    "BACKEND": "planetarium.seat_events.InProcessBroker",
+    "QUEUE_SIZE": 10,
+    "HEARTBEAT": 0.05,
+    "MAX_AGE": 1,
+    "RETRY": 3000,
+    "POLL_INTERVAL": 0.01,
+    "MESSAGE_TIMEOUT": 60,
+}
+
+
+def seat_events_url(show_session_id):
+    return reverse(
+        "planetarium:showsession-seat-events", args=[show_session_id]
+    )
+
+
+def parse_event(chunk):
+    fields = dict(
+        line.split(": ", 1) for line in chunk.decode().strip().splitlines()
+    )
+    if "data" in fields:
+        fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+@override_settings(SEAT_EVENTS=SEAT_EVENTS)
+class SeatEventsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        token = RefreshToken.for_user(self.user).access_token
+        self.headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "text/event-stream",
+        }
+        self.show_session = ShowSession.objects.create(
+            show_time="2022-06-02T14:00:00",
+            astronomy_show=AstronomyShow.objects.create(
+                title="Mars", description="red planet", duration=45
+            ),
+            planetarium_dome=PlanetariumDome.objects.create(
+                name="planetarium",
+                address="any address",
+                city_state_province="any province",
+                country="any country",
+                rows=10,
+                seats_in_row=6,
+            ),
+        )
+        self.reservation = Reservation.objects.create(user=self.user)
+
+    async def open_stream(self, **headers):
+        res = await AsyncClient().get(
+            seat_events_url(self.show_session.id),
+            headers={**self.headers, **headers},
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        stream = aiter(res.streaming_content)
+        self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+        return stream
+
+    async def next_event(self, stream):
+        while (chunk := await anext(stream)).startswith(b":"):
+            pass
+        return parse_event(chunk)
+
+    async def drain(self, stream):
+        async for chunk in stream:
+            self.assertTrue(chunk.startswith(b":"))
+
+    def take_seat(self, seat):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Ticket.objects.create(
+                row=1,
+                seat=seat,
+                show_session=self.show_session,
+                reservation=self.reservation,
+            )
+
+    def release_seat(self, ticket):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.delete()
+
+    async def test_committed_seats_are_pushed(self):
+        stream = await self.open_stream()
+
+        ticket = await sync_to_async(self.take_seat)(3)
+        taken = await self.next_event(stream)
+        await sync_to_async(self.release_seat)(ticket)
+        released = await self.next_event(stream)
+        await self.drain(stream)
+
+        self.assertEqual(taken["event"], "seats")
+        self.assertEqual(taken["id"], "2")
+        self.assertEqual(taken["data"]["taken"], [[1, 3]])
+        self.assertEqual(released["id"], "3")
+        self.assertEqual(released["data"]["released"], [[1, 3]])
+
+    async def test_outdated_client_is_reset(self):
+        stream = await self.open_stream(**{"Last-Event-ID": "0"})
+
+        reset = await self.next_event(stream)
+        get_broker().publish(
+            f"show_session:{self.show_session.id}",
+            {"show_session": self.show_session.id, "version": 3},
+        )
+        missed = await self.next_event(stream)
+        await self.drain(stream)
+
+        self.assertEqual(reset["event"], "reset")
+        self.assertEqual(reset["data"], {"version": 1})
+        self.assertEqual(missed["event"], "reset")
+        self.assertEqual(missed["id"], "3")
+
+    def test_wsgi_falls_back_to_polling(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(
+            seat_events_url(self.show_session.id),
+            headers={"Accept": "text/event-stream"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        self.assertFalse(res.streaming)
+        retry, reset = res.content.split(b"\n\n", 1)
+        self.assertEqual(parse_event(reset)["event"], "reset")
+
+    def test_unknown_show_session(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        res = client.get(
+            seat_events_url(404), headers={"Accept": "text/event-stream"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(res["Content-Type"], "application/json")
+
+
+class CacheBrokerTests(SimpleTestCase):
+    async def test_messages_reach_subscribers_of_other_brokers(self):
+        cache.clear()
+        subscriber = CacheBroker(SEAT_EVENTS)
+        publisher = CacheBroker(SEAT_EVENTS)
+        publisher.publish("show_session:1", {"version": 1})
+
+        async with subscriber.subscribe("show_session:1") as subscription:
+            publisher.publish("show_session:1", {"version": 2})
+            publisher.publish("show_session:2", {"version": 1})
+            publisher.publish("show_session:1", {"version": 3})
+            messages = [await subscription.get(1) for _ in range(2)]
+            self.assertIsNone(await subscription.get(0.05))
+
+        self.assertEqual(messages, [{"version": 2}, {"version": 3}])
+        await asyncio.sleep(SEAT_EVENTS["POLL_INTERVAL"] * 3)
+        self.assertFalse(subscriber.positions)
@@ -0,0 +1,206 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from planetarium.models import (
+    AstronomyShow,
+    PlanetariumDome,
+    ShowSession,
+    SeatHold,
+    Ticket,
+)
+
+SEAT_HOLD_URL = reverse("planetarium:seathold-list")
+CHECKOUT_URL = reverse("planetarium:seathold-checkout")
+RESERVATION_URL = reverse("planetarium:reservation-list")
+
+
+def sample_show_session(**params):
+    defaults = {
+        "show_time": "2022-06-02T14:00:00",
+        "astronomy_show": AstronomyShow.objects.create(
+            title="test title", description="test description", duration=45
+        ),
+        "planetarium_dome": PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=6,
+        ),
+    }
+    defaults.update(params)
+    return ShowSession.objects.create(**defaults)
+
+
+class UnauthentikatedSeatHoldTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_auth_requires(self):
+        res = self.client.get(SEAT_HOLD_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class AuthenticateSeatHoldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password", is_staff=True
+        )
+        self.other_user = get_user_model().objects.create_user(
+            "cosmonaut@cosmonaut.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        self.show_session = sample_show_session()
+
+    def hold(self, *places, **params):
+        payload = {
+            "show_session": self.show_session.id,
+            "seats": [{"row": row, "seat": seat} for row, seat in places],
+        }
+        payload.update(params)
+        return self.client.post(SEAT_HOLD_URL, payload, format="json")
+
+    def test_hold_seats(self):
+        res = self.hold((1, 1), (1, 2), minutes=5)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 2)
+        hold = SeatHold.objects.get(row=1, seat=1)
+        self.assertEqual(hold.user, self.user)
+        self.assertLessEqual(
+            hold.expires_at, timezone.now() + timedelta(minutes=5)
+        )
+
+    def test_hold_seat_held_by_another_user(self):
+        SeatHold.objects.hold_seats(
+            self.other_user, self.show_session, [(1, 1)], timedelta(minutes=5)
+        )
+
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hold_seat_with_expired_hold(self):
+        SeatHold.objects.hold_seats(
+            self.other_user, self.show_session, [(1, 1)], -timedelta(1)
+        )
+
+        res = self.hold((1, 1))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SeatHold.objects.get().user, self.user)
+
+    def test_hold_seat_out_of_range(self):
+        res = self.hold((1, 7))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("seat", res.data)
+
+    def test_held_seats_in_seat_map(self):
+        self.hold((1, 2))
+
+        res = self.client.get(
+            reverse(
+                "planetarium:showsession-seat-map",
+                args=[self.show_session.id],
+            ),
+            {"encoding": "rle"},
+        )
+
+        self.assertEqual(res.data["held"], [1, 1, 58])
+        self.assertEqual(res.data["seat_map"], [60])
+
+    def test_list_active_holds(self):
+        self.hold((1, 1))
+        SeatHold.objects.hold_seats(
+            self.other_user, self.show_session, [(2, 1)], timedelta(minutes=5)
+        )
+        SeatHold.objects.hold_seats(
+            self.user, self.show_session, [(3, 1)], -timedelta(1)
+        )
+
+        res = self.client.get(SEAT_HOLD_URL)
+
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(res.data["results"][0]["row"], 1)
+
+    def test_hold_and_checkout_forbidden_for_users(self):
+        self.client.force_authenticate(self.other_user)
+
+        res_hold = self.hold((1, 1), (1, 2))
+        res_checkout = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res_hold.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(res_checkout.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(SeatHold.objects.exists())
+
+    def test_checkout(self):
+        self.hold((1, 1), (1, 2))
+
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data["tickets"]), 2)
+        self.assertFalse(SeatHold.objects.exists())
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 2)
+
+    def test_checkout_without_holds(self):
+        res = self.client.post(CHECKOUT_URL, {}, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+    def test_reservation_of_seat_held_by_another_user(self):
+        staff = get_user_model().objects.create_user(
+            "admin@admin.com", "password", is_staff=True
+        )
+        self.hold((1, 1))
+        self.client.force_authenticate(staff)
+
+        res = self.client.post(
+            RESERVATION_URL,
+            {
+                "tickets": [
+                    {"row": 1, "seat": 1, "show_session": self.show_session.id}
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["tickets"],
+            [f"row: 1, seat: 1 is held for show session {self.show_session.id}"],
+        )
+
+
+class SweepSeatHoldsCommandTests(TestCase):
+    def test_sweep_deletes_expired_holds(self):
+        user = get_user_model().objects.create_user(
+            "astronaut@astronaut.com", "password"
+        )
+        show_session = sample_show_session()
+        SeatHold.objects.hold_seats(
+            user, show_session, [(1, 1), (1, 2)], -timedelta(1)
+        )
+        SeatHold.objects.hold_seats(
+            user, show_session, [(2, 1)], timedelta(minutes=5)
+        )
+
+        call_command("sweep_seat_holds", batch_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            list(SeatHold.objects.values_list("row", "seat")), [(2, 1)]
+        )
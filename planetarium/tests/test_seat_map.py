@@ -0,0 +1,64 @@
+from django.test import TestCase
+
+from planetarium.seat_map import SeatMap
+
+
+class SeatMapTests(TestCase):
+    def test_take_and_release_seats(self):
+        seat_map = SeatMap(3, 5)
+
+        seat_map.take(1, 1)
+        seat_map.take(2, 4)
+        seat_map.take(3, 5)
+        seat_map.release(1, 1)
+
+        self.assertFalse(seat_map.is_taken(1, 1))
+        self.assertTrue(seat_map.is_taken(2, 4))
+        self.assertTrue(seat_map.is_taken(3, 5))
+        self.assertEqual(sum(seat_map), 2)
+
+    def test_size_follows_dome_capacity(self):
+        self.assertEqual(len(SeatMap(3, 5).to_bytes()), 2)
+        self.assertEqual(len(SeatMap(4, 4).to_bytes()), 2)
+        self.assertEqual(len(SeatMap(10, 6, b"\xff" * 20).to_bytes()), 8)
+
+    def test_encodings(self):
+        seat_map = SeatMap.from_places(2, 4, [(1, 2), (1, 3), (2, 4)])
+
+        self.assertEqual(seat_map.to_bytes(), b"\x61")
+        self.assertEqual(seat_map.to_base64(), "YQ==")
+        self.assertEqual(seat_map.to_rle(), [1, 2, 4, 1])
+        self.assertEqual(SeatMap(2, 4).to_rle(), [8])
+
+    def test_best_block_prefers_centre(self):
+        seat_map = SeatMap(5, 10)
+
+        self.assertEqual(seat_map.best_block(2), (3, 5))
+        for seat in range(3, 9):
+            seat_map.take(3, seat)
+        self.assertEqual(seat_map.best_block(2), (2, 5))
+        self.assertEqual(seat_map.best_block(10), (2, 1))
+        self.assertIsNone(seat_map.best_block(11))
+
+    def test_best_block_within_free_run(self):
+        seat_map = SeatMap.from_places(1, 10, [(1, 4), (1, 9)])
+
+        self.assertEqual(seat_map.best_block(4), (1, 5))
+        self.assertEqual(seat_map.best_block(3), (1, 5))
+        self.assertIsNone(seat_map.best_block(5))
+
+    def test_merge(self):
+        seat_map = SeatMap.from_places(2, 4, [(1, 1)])
+
+        seat_map.merge(SeatMap.from_places(2, 4, [(2, 4)]))
+
+        self.assertEqual(seat_map.to_rle(), [0, 1, 6, 1])
+
+    def test_places_outside_of_the_dome(self):
+        seat_map = SeatMap.from_places(2, 4, [(1, 5), (3, 1), (2, 2)])
+
+        self.assertEqual(sum(seat_map), 1)
+        self.assertFalse(seat_map.is_taken(1, 5))
+        seat_map.release(3, 1)
+        with self.assertRaises(IndexError):
+            seat_map.take(1, 5)
@@ -1,3 +1,7 @@
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command, CommandError
 from django.test import TestCase
 
 from django.contrib.auth import get_user_model
@@ -9,6 +13,8 @@ from planetarium.models import (
     AstronomyShow,
     PlanetariumDome,
     ShowSession,
+    Reservation,
+    Ticket,
 )
 from planetarium.serializers import (
     ShowSessionListSerializer,
@@ -24,6 +30,14 @@ def detail_url(astro_show_id: int):
     return reverse("planetarium:showsession-detail", args=[astro_show_id])
 
 
+def allocate_url(show_session_id: int):
+    return reverse("planetarium:showsession-allocate", args=[show_session_id])
+
+
+def seat_map_url(show_session_id: int):
+    return reverse("planetarium:showsession-seat-map", args=[show_session_id])
+
+
 def sample_astronomy_show(**params):
     defaults = {
         "title": "test title",
@@ -68,6 +82,7 @@ class UnauthentikatedShowSessionTest(TestCase):
 
 class AuthenticateShowSessionTests(TestCase):
     def setUp(self):
+        caches["responses"].clear()
         self.client = APIClient()
         self.user = get_user_model().objects.create_user(
             "astronaut@astronaut.com", "password"
@@ -89,6 +104,25 @@ class AuthenticateShowSessionTests(TestCase):
                 res.data["results"][0][key],
             )
 
+    def test_show_session_list_tickets_available(self):
+        show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create_tickets(
+            reservation,
+            [
+                {"row": 1, "seat": 1, "show_session": show_session},
+                {"row": 1, "seat": 2, "show_session": show_session},
+            ],
+        )
+        Ticket.objects.create(
+            row=2, seat=1, show_session=show_session, reservation=reservation
+        )
+        Ticket.objects.get(row=1, seat=1).delete()
+
+        res = self.client.get(SHOW_SESSION_URL)
+
+        self.assertEqual(res.data["results"][0]["tickets_available"], 58)
+
     def test_retrieve_show_session_details(self):
         show_session = sample_show_session()
 
@@ -99,6 +133,41 @@ class AuthenticateShowSessionTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data, serializer.data)
 
+    def test_show_session_seat_map(self):
+        show_session = sample_show_session()
+        reservation = Reservation.objects.create(user=self.user)
+        Ticket.objects.create_tickets(
+            reservation,
+            [
+                {"row": 1, "seat": 2, "show_session": show_session},
+                {"row": 1, "seat": 3, "show_session": show_session},
+                {"row": 10, "seat": 6, "show_session": show_session},
+            ],
+        )
+        reservation.tickets.get(row=1, seat=3).delete()
+
+        res = self.client.get(seat_map_url(show_session.id))
+        res_rle = self.client.get(
+            seat_map_url(show_session.id), {"encoding": "rle"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["encoding"], "base64")
+        self.assertEqual(res.data["seat_map"], "QAAAAAAAABA=")
+        self.assertEqual(res_rle.data["seat_map"], [1, 1, 57, 1])
+        self.assertEqual(res_rle.data["rows"], 10)
+        self.assertEqual(res_rle.data["seats_in_row"], 6)
+
+    def test_allocate_forbidden(self):
+        show_session = sample_show_session()
+
+        res = self.client.post(
+            allocate_url(show_session.id), {"party_size": 4}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Ticket.objects.exists())
+
     def test_show_session_filter_by_date(self):
         sample_show_session()
         sample_show_session(show_time="2022-06-03T14:00:00")
@@ -113,6 +182,68 @@ class AuthenticateShowSessionTests(TestCase):
             res.data["results"][0]["show_time"], "2022-06-03T14:00:00"
         )
 
+    def test_show_session_filter_by_show_time_range(self):
+        sample_show_session(show_time="2022-06-02T14:00:00")
+        sample_show_session(show_time="2022-06-03T10:00:00")
+        sample_show_session(show_time="2022-06-05T00:00:00")
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {
+                "show_time_from": "2022-06-02T14:00",
+                "show_time_to": "2022-06-05",
+            },
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [session["show_time"] for session in res.data["results"]],
+            ["2022-06-03T10:00:00", "2022-06-02T14:00:00"],
+        )
+
+    def test_show_session_filter_by_show_time_with_utc_offset(self):
+        sample_show_session(show_time="2022-06-02T14:00:00")
+        sample_show_session(show_time="2022-06-02T16:00:00")
+
+        res = self.client.get(
+            SHOW_SESSION_URL,
+            {"show_time_from": "2022-06-02T12:00:00+00:00"},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [session["show_time"] for session in res.data["results"]],
+            ["2022-06-02T16:00:00"],
+        )
+
+    def test_show_session_filter_by_invalid_show_time(self):
+        res = self.client.get(SHOW_SESSION_URL, {"show_time_from": "June"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("show_time_from", res.data)
+
+    def test_show_session_filter_by_invalid_ids(self):
+        for param in ("astronomy_show", "planetarium_dome"):
+            with self.subTest(param=param):
+                res = self.client.get(SHOW_SESSION_URL, {param: "abc"})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(param, res.data)
+
+    def test_show_session_filter_by_planetarium_dome_id(self):
+        sample_show_session()
+        another_dome = sample_planetarium_dome(name="another dome")
+        sample_show_session(planetarium_dome=another_dome)
+
+        res = self.client.get(
+            SHOW_SESSION_URL, {"planetarium_dome": another_dome.id}
+        )
+
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(
+            res.data["results"][0]["planetarium_dome_name"], "another dome"
+        )
+
     def test_show_session_filter_by_astronomy_show_id(self):
         sample_show_session()
         another_astro_show = sample_astronomy_show(
@@ -133,6 +264,47 @@ class AuthenticateShowSessionTests(TestCase):
             res.data["results"][0]["astronomy_show_title"], "test title"
         )
 
+    def test_show_session_cursor_pagination(self):
+        astronomy_show = sample_astronomy_show()
+        planetarium_dome = sample_planetarium_dome()
+        for show_time in ("2022-06-02", "2022-06-03", "2022-06-03"):
+            for _ in range(2):
+                ShowSession.objects.create(
+                    show_time=show_time,
+                    astronomy_show=astronomy_show,
+                    planetarium_dome=planetarium_dome,
+                )
+
+        pages = []
+        res = self.client.get(
+            SHOW_SESSION_URL, {"pagination": "cursor", "page_size": 4}
+        )
+        pages.append(res.data)
+        while pages[-1]["next"]:
+            pages.append(self.client.get(pages[-1]["next"]).data)
+        previous = self.client.get(pages[-1]["previous"]).data
+
+        expected_ids = list(
+            ShowSession.objects.order_by("-show_time", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(len(pages), 2)
+        self.assertNotIn("count", pages[0])
+        self.assertIsNone(pages[0]["previous"])
+        self.assertEqual(
+            [session["id"] for page in pages for session in page["results"]],
+            expected_ids,
+        )
+        self.assertEqual(previous["results"], pages[0]["results"])
+
+    def test_show_session_invalid_cursor(self):
+        res = self.client.get(
+            SHOW_SESSION_URL, {"pagination": "cursor", "cursor": "broken"}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_create_show_session_forbidden(self):
         payload = {
             "show_time": "2022-06-02T14:00:00",
@@ -168,3 +340,145 @@ class AdminShowSessionApiTests(TestCase):
         serializer = ShowSessionSerializer(show_session)
         for key in payload.keys():
             self.assertEqual(payload[key], serializer.data[key])
+
+    def test_allocate_best_seats(self):
+        show_session = sample_show_session()
+
+        res = self.client.post(
+            allocate_url(show_session.id), {"party_size": 4}, format="json"
+        )
+        second = self.client.post(
+            allocate_url(show_session.id), {"party_size": 4}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [
+                (ticket["row"], ticket["seat"])
+                for ticket in res.data["tickets"]
+            ],
+            [(5, 2), (5, 3), (5, 4), (5, 5)],
+        )
+        self.assertEqual(second.data["tickets"][0]["row"], 6)
+        show_session.refresh_from_db()
+        self.assertEqual(show_session.tickets_sold, 8)
+
+    def test_allocate_without_adjacent_seats(self):
+        show_session = sample_show_session()
+
+        res = self.client.post(
+            allocate_url(show_session.id), {"party_size": 7}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Ticket.objects.exists())
+
+
+class RebuildSessionOccupancyCommandTests(TestCase):
+    def setUp(self):
+        self.show_session = sample_show_session()
+        reservation = Reservation.objects.create(
+            user=get_user_model().objects.create_user(
+                "astronaut@astronaut.com", "password"
+            )
+        )
+        Ticket.objects.create(
+            row=1,
+            seat=1,
+            show_session=self.show_session,
+            reservation=reservation,
+        )
+        ShowSession.objects.update(tickets_sold=5, seat_map=b"")
+
+    def test_check_reports_wrong_counters(self):
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command("rebuild_session_occupancy", check=True, stdout=out)
+
+        self.assertIn("tickets_sold=5, tickets=1", out.getvalue())
+
+    def test_rebuild_fixes_counters(self):
+        call_command("rebuild_session_occupancy", stdout=StringIO())
+
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 1)
+        self.assertTrue(self.show_session.get_seat_map().is_taken(1, 1))
+        call_command(
+            "rebuild_session_occupancy", check=True, stdout=StringIO()
+        )
+
+
+class ResizedDomeOccupancyTests(TestCase):
+    def setUp(self):
+        self.show_session = sample_show_session()
+        self.dome = self.show_session.planetarium_dome
+        self.reservation = Reservation.objects.create(
+            user=get_user_model().objects.create_user(
+                "astronaut@astronaut.com", "password"
+            )
+        )
+        Ticket.objects.create(
+            row=2,
+            seat=1,
+            show_session=self.show_session,
+            reservation=self.reservation,
+        )
+
+    def resize(self, **size):
+        for field, value in size.items():
+            setattr(self.dome, field, value)
+        self.dome.save()
+        self.show_session.refresh_from_db()
+
+    def test_wider_dome_keeps_sold_seats(self):
+        self.resize(seats_in_row=8)
+
+        seat_map = self.show_session.get_seat_map()
+        self.assertTrue(seat_map.is_taken(2, 1))
+        self.assertFalse(seat_map.is_taken(1, 7))
+        Ticket.objects.create_tickets(
+            self.reservation,
+            [{"show_session": self.show_session, "row": 1, "seat": 7}],
+        )
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 2)
+
+    def test_tickets_outside_of_smaller_dome_can_be_deleted(self):
+        Ticket.objects.create(
+            row=9,
+            seat=1,
+            show_session=self.show_session,
+            reservation=self.reservation,
+        )
+
+        self.resize(rows=5)
+        self.assertEqual(self.show_session.tickets_sold, 2)
+        self.reservation.delete()
+
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 0)
+        self.assertEqual(sum(self.show_session.get_seat_map()), 0)
+
+    def test_reservation_delete_releases_seats_at_once(self):
+        Ticket.objects.create(
+            row=2,
+            seat=2,
+            show_session=self.show_session,
+            reservation=self.reservation,
+        )
+        self.show_session.refresh_from_db()
+        version = self.show_session.version
+
+        self.reservation.delete()
+
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.version, version + 1)
+        self.assertEqual(self.show_session.tickets_sold, 0)
+        self.assertEqual(sum(self.show_session.get_seat_map()), 0)
+
+    def test_user_delete_releases_seats_once(self):
+        self.reservation.user.delete()
+
+        self.show_session.refresh_from_db()
+        self.assertEqual(self.show_session.tickets_sold, 0)
+        self.assertEqual(sum(self.show_session.get_seat_map()), 0)
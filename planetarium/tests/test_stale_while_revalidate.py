@@ -0,0 +1,158 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from planetarium.models import AstronomyShow, PlanetariumDome, ShowSession
+from planetarium.response_cache import RESPONSE_CACHE_HEADER
+
+SHOW_SESSION_URL = reverse("planetarium:showsession-list")
+SWR_KEY_PREFIX = "planetarium:swr:"
+
+
+def swr_settings(**options):
+    defaults = {
+        "SOFT_TTL": 60,
+        "HARD_TTL": 300,
+        "LOCK_TIMEOUT": 10,
+        "BACKGROUND_REFRESH": False,
+    }
+    defaults.update(options)
+    return override_settings(SHOW_SESSION_LIST_CACHE=defaults)
+
+
+class ShowSessionListMixin:
+    def setUp(self):
+        self.cache = caches["responses"]
+        self.cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                "astronaut@astronaut.com", "password"
+            )
+        )
+        self.show = AstronomyShow.objects.create(
+            title="Mars", description="red planet", duration=45
+        )
+        self.dome = PlanetariumDome.objects.create(
+            name="planetarium",
+            address="any address",
+            city_state_province="any province",
+            country="any country",
+            rows=10,
+            seats_in_row=6,
+        )
+        self.add_show_session()
+
+    def add_show_session(self):
+        ShowSession.objects.create(
+            show_time="2022-06-02T14:00:00",
+            astronomy_show=self.show,
+            planetarium_dome=self.dome,
+        )
+
+    def get(self):
+        res = self.client.get(SHOW_SESSION_URL)
+        return res[RESPONSE_CACHE_HEADER], res.data
+
+    def entry_key(self):
+        self.get()
+        (key,) = (
+            key
+            for key in self.cache._cache
+            if SWR_KEY_PREFIX in key and not key.endswith(":lock")
+        )
+        return key.split(":", 2)[2]
+
+
+class StaleWhileRevalidateTests(ShowSessionListMixin, TestCase):
+    @swr_settings()
+    def test_fresh_entry_is_served_without_queries(self):
+        self.assertEqual(self.get()[0], "MISS")
+
+        with self.assertNumQueries(0):
+            state, data = self.get()
+
+        self.assertEqual(state, "HIT")
+        self.assertEqual(len(data["results"]), 1)
+
+    @swr_settings(SOFT_TTL=0)
+    def test_stale_entry_is_served_while_refresh_is_running(self):
+        key = self.entry_key()
+        self.cache.add(f"{key}:lock", 1)
+        self.add_show_session()
+
+        with self.assertNumQueries(0):
+            state, data = self.get()
+
+        self.assertEqual(state, "STALE")
+        self.assertEqual(len(data["results"]), 1)
+
+    @swr_settings(SOFT_TTL=0)
+    def test_stale_entry_is_refreshed(self):
+        self.get()
+        self.add_show_session()
+
+        state, data = self.get()
+
+        self.assertEqual(state, "MISS")
+        self.assertEqual(len(data["results"]), 2)
+
+    @swr_settings(LOCK_TIMEOUT=5)
+    def test_cold_miss_waits_for_lock_holder(self):
+        key = self.entry_key()
+        entry = self.cache.get(key)
+        self.cache.clear()
+        self.cache.add(f"{key}:lock", 1)
+        timer = threading.Timer(0.1, self.cache.set, args=(key, entry))
+        timer.start()
+
+        with self.assertNumQueries(0):
+            state, data = self.get()
+        timer.join()
+
+        self.assertEqual(state, "HIT")
+        self.assertEqual(data, entry["data"])
+
+    @swr_settings(LOCK_TIMEOUT=0.1)
+    def test_cold_miss_computes_after_lock_timeout(self):
+        key = self.entry_key()
+        self.cache.clear()
+        self.cache.add(f"{key}:lock", 1)
+
+        start = time.monotonic()
+        state, data = self.get()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertEqual(state, "MISS")
+        self.assertEqual(len(data["results"]), 1)
+        self.assertIsNotNone(self.cache.get(f"{key}:lock"))
+
+
+class BackgroundRefreshTests(ShowSessionListMixin, TransactionTestCase):
+    @swr_settings(SOFT_TTL=0, BACKGROUND_REFRESH=True)
+    def test_stale_entry_is_refreshed_in_background(self):
+        key = self.entry_key()
+        self.add_show_session()
+        threads = []
+
+        class RecordingThread(threading.Thread):
+            def start(self):
+                threads.append(self)
+                super().start()
+
+        with mock.patch("planetarium.response_cache.Thread", RecordingThread):
+            state, data = self.get()
+        (thread,) = threads
+        thread.join(5)
+
+        self.assertEqual(state, "STALE")
+        self.assertEqual(len(data["results"]), 1)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(self.cache.get(key)["data"]["results"]), 2)
+        self.assertIsNone(self.cache.get(f"{key}:lock"))
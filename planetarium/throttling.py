@@ -0,0 +1,7 @@
+from rest_framework.throttling import UserRateThrottle
+
+
+class SuggestRateThrottle(UserRateThrottle):
+    """Typeahead requests come per keystroke and get a rate of their own"""
+
+    scope = "suggest"
@@ -0,0 +1,107 @@
+import threading
+from bisect import bisect_left, insort
+
+from planetarium.cache import bump_model_version, get_model_version
+from planetarium.models import AstronomyShow
+
+
+def normalize(text):
+    return " ".join(text.casefold().split())
+
+
+class TitleIndex:
+    """Sorted array of title word suffixes for prefix lookups.
+
+    Each title is stored once per word, so "Black hole" is found by both
+    "bla" and "hol". Lookups are a bisect plus a short scan and never
+    touch the database; the version tells which data the index holds.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._keys = []
+        self._titles = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _entries(pk, title):
+        words = normalize(title).split(" ")
+        return [(" ".join(words[i:]), pk) for i in range(len(words))]
+
+    def build(self, rows, version):
+        """Replace the content with (pk, title) rows"""
+        titles = dict(rows)
+        keys = sorted(
+            entry
+            for pk, title in titles.items()
+            for entry in self._entries(pk, title)
+        )
+        with self._lock:
+            self._keys, self._titles = keys, titles
+            self.version = version
+
+    def add(self, pk, title):
+        with self._lock:
+            self.remove(pk)
+            self._titles[pk] = title
+            for entry in self._entries(pk, title):
+                insort(self._keys, entry)
+
+    def remove(self, pk):
+        with self._lock:
+            title = self._titles.pop(pk, None)
+            if title is None:
+                return
+            for entry in self._entries(pk, title):
+                index = bisect_left(self._keys, entry)
+                if index < len(self._keys) and self._keys[index] == entry:
+                    del self._keys[index]
+
+    def update(self, pk, title, version):
+        """Apply one change if the index was current right before it.
+
+        Otherwise another process changed titles as well, and the index
+        is left stale to be rebuilt on the next lookup.
+        """
+        with self._lock:
+            if self.version is None or version != self.version + 1:
+                return
+            if title is None:
+                self.remove(pk)
+            else:
+                self.add(pk, title)
+            self.version = version
+
+    def suggest(self, prefix, limit=10):
+        """Return up to limit (pk, title) pairs matching the prefix"""
+        prefix = normalize(prefix)
+        keys, titles = self._keys, self._titles
+        found = {}
+        index = bisect_left(keys, (prefix,))
+        while len(found) < limit and index < len(keys):
+            key, pk = keys[index]
+            if not key.startswith(prefix):
+                break
+            if pk in titles:
+                found.setdefault(pk, titles[pk])
+            index += 1
+        return list(found.items())
+
+
+title_index = TitleIndex()
+
+
+def get_title_index():
+    """Return the title index, rebuilt if the titles changed since"""
+    version = get_model_version(AstronomyShow)
+    if title_index.version != version:
+        title_index.build(
+            AstronomyShow.objects.values_list("id", "title").iterator(),
+            version,
+        )
+    return title_index
+
+
+def title_changed(pk, title=None):
+    """Record a saved (or deleted, without title) astronomy show"""
+    title_index.update(pk, title, bump_model_version(AstronomyShow))
@@ -1,6 +1,12 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from planetarium.async_views import (
+    AstronomyShowAsyncView,
+    PlanetariumDomeAsyncView,
+    ShowSessionAsyncView,
+    ShowThemeAsyncView,
+)
 from planetarium.views import (
     ShowThemeViewSet,
     PlanetariumDomeViewSet,
@@ -8,6 +14,10 @@ from planetarium.views import (
     ShowSessionViewSet,
     ReservationViewSet,
     TicketViewSet,
+    SeatHoldViewSet,
+    ReservationRequestViewSet,
+    ExportViewSet,
+    ProfileViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -16,7 +26,34 @@ router.register("planetarium_dome", PlanetariumDomeViewSet)
 router.register("astronomy_show", AstronomyShowViewSet)
 router.register("show_session", ShowSessionViewSet)
 router.register("reservation", ReservationViewSet)
+router.register("seat_hold", SeatHoldViewSet)
+router.register("reservation_request", ReservationRequestViewSet)
+router.register("export", ExportViewSet, basename="export")
+router.register("profile", ProfileViewSet, basename="profile")
+
+async_urlpatterns = []
+for prefix, basename, async_view in (
+    ("show_theme", "showtheme", ShowThemeAsyncView),
+    ("planetarium_dome", "planetariumdome", PlanetariumDomeAsyncView),
+    ("astronomy_show", "astronomyshow", AstronomyShowAsyncView),
+    ("show_session", "showsession", ShowSessionAsyncView),
+):
+    async_urlpatterns += [
+        path(
+            f"{prefix}/",
+            async_view.as_view(),
+            name=f"async-{basename}-list",
+        ),
+        path(
+            f"{prefix}/<int:pk>/",
+            async_view.as_view(),
+            name=f"async-{basename}-detail",
+        ),
+    ]
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
+]
 
 app_name = "planetarium"
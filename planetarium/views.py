@@ -1,14 +1,58 @@
-from datetime import datetime
-
-from django.db.models import Count, F
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Prefetch,
+    Q,
+    Value,
+    When,
+    prefetch_related_objects,
+)
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, status
+from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAdminUser
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import (
+    JWTStatelessUserAuthentication,
+)
 
-from pagination import AstroListPagination
+from pagination import (
+    AstroListPagination,
+    CursorPaginationMixin,
+    EstimatedCountPagination,
+)
+from planetarium.exports import (
+    EXPORT_FORMATS,
+    RESERVATION_EXPORT_FIELDS,
+    TICKET_EXPORT_FIELDS,
+    export_rows,
+)
+from planetarium.fast_serializers import (
+    AstronomyShowListValuesSerializer,
+    ShowSessionListValuesSerializer,
+    TicketListValuesSerializer,
+    ValuesListMixin,
+)
+from planetarium.idempotency import (
+    IdempotentCreateMixin,
+    IDEMPOTENCY_KEY_HEADER,
+)
 from planetarium.models import (
     ShowTheme,
     PlanetariumDome,
@@ -16,8 +60,27 @@ from planetarium.models import (
     ShowSession,
     Reservation,
     Ticket,
+    SeatHold,
+    ReservationRequest,
 )
 from planetarium.permissions import IsAdminOrIfAuthenticatedReadOnly
+from planetarium.profiling import folded_stacks, get_profile, profiles
+from planetarium.response_cache import (
+    ConditionalRetrieveMixin,
+    StaleWhileRevalidateMixin,
+    VersionedResponseCacheMixin,
+)
+from planetarium.renderers import (
+    CSVRenderer,
+    EventStreamRenderer,
+    NDJSONRenderer,
+    ORJSONRenderer,
+)
+from planetarium.reservation_queue import QueuedReservationCreateMixin
+from planetarium.seat_events import format_event, seat_event_stream
+from planetarium.seat_map import SEAT_MAP_ENCODINGS
+from planetarium.throttling import SuggestRateThrottle
+from planetarium.title_index import get_title_index
 from planetarium.serializers import (
     ShowThemeSerializers,
     PlanetariumDomeSerializer,
@@ -25,26 +88,111 @@ from planetarium.serializers import (
     ShowSessionSerializer,
     ShowSessionListSerializer,
     ShowSessionDetailSerializer,
+    ShowSessionSeatMapSerializer,
+    ShowSessionAllocateSerializer,
     ReservationSerializer,
     TicketSerializer,
     PlanetariumDomeListSerializer,
     ReservationListSerializer,
     AstronomyShowListSerializer,
+    AstronomyShowSuggestionSerializer,
     AstronomyShowDetailSerializer,
     AstronomyShowImageSerializer,
     TicketListSerializer,
+    SeatHoldSerializer,
+    SeatHoldCreateSerializer,
+    SeatHoldCheckoutSerializer,
+    ReservationRequestSerializer,
+    ProfileSerializer,
+    ProfileDetailSerializer,
 )
 
-
-class ShowThemeViewSet(viewsets.ModelViewSet):
+THEME_MATCH_MODES = ("any", "all")
+
+
+def _parse_show_time(value, param):
+    """Converts a date or date and time string to a naive local datetime"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationError(
+            {param: "Use YYYY-MM-DD or YYYY-MM-DDTHH:MM[:SS] format"}
+        )
+    if timezone.is_aware(parsed):
+        # Show times are stored naive in TIME_ZONE (USE_TZ is off)
+        parsed = timezone.make_naive(parsed)
+    return parsed
+
+
+def _parse_id(value, param):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({param: "A valid integer is required."})
+
+
+EXPORT_PARAMETERS = [
+    OpenApiParameter(
+        name="export_format",
+        type=str,
+        enum=list(EXPORT_FORMATS),
+        description="ndjson or csv (ex: ?export_format=csv), by default "
+        "the format of the Accept header, else ndjson",
+    ),
+    OpenApiParameter(name="show_session", type=int),
+    OpenApiParameter(name="astronomy_show", type=int),
+    OpenApiParameter(name="planetarium_dome", type=int),
+    OpenApiParameter(
+        name="show_time_from",
+        type=str,
+        description="Sessions from this date or time (ex: 2023-09-01)",
+    ),
+    OpenApiParameter(
+        name="show_time_to",
+        type=str,
+        description="Sessions before this date or time (ex: 2023-10-01)",
+    ),
+]
+
+EXPORT_RENDERER_CLASSES = [ORJSONRenderer, NDJSONRenderer, CSVRenderer]
+
+PROFILE_TOP_STACKS = 20
+PROFILE_ID_PARAMETERS = [
+    OpenApiParameter(name="id", type=int, location=OpenApiParameter.PATH),
+]
+
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+CURSOR_PAGINATION_PARAMETERS = [
+    OpenApiParameter(
+        name="pagination",
+        type=str,
+        enum=["cursor"],
+        description="Use keyset pagination with stable cursors instead "
+        "of page numbers (ex: ?pagination=cursor)",
+    ),
+    OpenApiParameter(
+        name="cursor",
+        type=str,
+        description="Opaque cursor from the next or previous link",
+    ),
+]
+
+
+class ShowThemeViewSet(VersionedResponseCacheMixin, viewsets.ModelViewSet):
     queryset = ShowTheme.objects.all()
+    cache_models = (ShowTheme,)
     serializer_class = ShowThemeSerializers
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
     pagination_class = AstroListPagination
 
 
-class PlanetariumDomeViewSet(viewsets.ModelViewSet):
+class PlanetariumDomeViewSet(
+    VersionedResponseCacheMixin, viewsets.ModelViewSet
+):
     queryset = PlanetariumDome.objects.all()
+    cache_models = (PlanetariumDome,)
     serializer_class = PlanetariumDomeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
     pagination_class = AstroListPagination
@@ -76,15 +224,25 @@ class PlanetariumDomeViewSet(viewsets.ModelViewSet):
         return PlanetariumDomeSerializer
 
 
-class AstronomyShowViewSet(viewsets.ModelViewSet):
-    queryset = AstronomyShow.objects.prefetch_related("theme")
+class AstronomyShowViewSet(
+    VersionedResponseCacheMixin,
+    ValuesListMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = AstronomyShow.objects.all()
+    cache_models = (AstronomyShow, AstronomyShow.theme.through, ShowTheme)
     serializer_class = AstronomyShowSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
     pagination_class = AstroListPagination
+    cursor_ordering = ("id",)
+    values_serializer_class = AstronomyShowListValuesSerializer
 
     def get_serializer_class(self):
         if self.action == "list":
             return AstronomyShowListSerializer
+        if self.action == "suggest":
+            return AstronomyShowSuggestionSerializer
         if self.action == "retrieve":
             return AstronomyShowDetailSerializer
         if self.action == "upload_image":
@@ -106,24 +264,128 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="prefix",
+                type=str,
+                required=True,
+                description="Beginning of a title word (ex. ?prefix=mar)",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description=f"Number of suggestions, "
+                f"at most {SUGGEST_MAX_LIMIT} (ex. ?limit=5)",
+            ),
+        ],
+        responses=AstronomyShowSuggestionSerializer(many=True),
+    )
+    @action(
+        methods=["GET"],
+        detail=False,
+        authentication_classes=[JWTStatelessUserAuthentication],
+        throttle_classes=[SuggestRateThrottle],
+        pagination_class=None,
+    )
+    def suggest(self, request):
+        """Titles starting with the prefix, served from memory"""
+        prefix = request.query_params.get("prefix", "").strip()
+        try:
+            limit = int(request.query_params.get("limit", SUGGEST_LIMIT))
+        except ValueError:
+            raise ValidationError({"limit": "A valid integer is required."})
+        limit = max(1, min(limit, SUGGEST_MAX_LIMIT))
+
+        suggestions = (
+            get_title_index().suggest(prefix, limit) if prefix else []
+        )
+        return Response(
+            [{"id": pk, "title": title} for pk, title in suggestions]
+        )
+
     @staticmethod
     def _params_to_ints(qs):
         """Converts a list of string IDs to a list of integers"""
-        return [int(str_id) for str_id in qs.split(",")]
+        return [_parse_id(str_id, "theme") for str_id in qs.split(",")]
+
+    @staticmethod
+    def _search(queryset, text):
+        """Full-text search ranked by relevance, title matches first.
+
+        PostgreSQL uses the GIN indexed search_vector, other databases
+        (the SQLite test configuration) fall back to substring matching.
+        """
+        if connections[queryset.db].vendor == "postgresql":
+            query = SearchQuery(
+                text,
+                config=AstronomyShow.SEARCH_CONFIG,
+                search_type="websearch",
+            )
+            return (
+                queryset.filter(search_vector=query)
+                .annotate(search_rank=SearchRank(F("search_vector"), query))
+                .order_by("-search_rank", "id")
+            )
+        return (
+            queryset.filter(
+                Q(title__icontains=text) | Q(description__icontains=text)
+            )
+            .annotate(
+                search_rank=Case(
+                    When(title__icontains=text, then=Value(1.0)),
+                    default=Value(0.5),
+                    output_field=FloatField(),
+                )
+            )
+            .order_by("-search_rank", "id")
+        )
+
+    @staticmethod
+    def _filter_by_themes(queryset, theme_ids, theme_match):
+        """Filter by themes with correlated EXISTS instead of a join.
+
+        Shows are never duplicated, so no DISTINCT is needed. With
+        theme_match=all every theme is a separate EXISTS probe.
+        """
+        if theme_match not in THEME_MATCH_MODES:
+            raise ValidationError(
+                {"theme_match": f"Use one of: {', '.join(THEME_MATCH_MODES)}"}
+            )
+        show_themes = AstronomyShow.theme.through.objects.filter(
+            astronomyshow_id=OuterRef("pk")
+        )
+        if theme_match == "any":
+            return queryset.filter(
+                Exists(show_themes.filter(showtheme_id__in=theme_ids))
+            )
+        for theme_id in set(theme_ids):
+            queryset = queryset.filter(
+                Exists(show_themes.filter(showtheme_id=theme_id))
+            )
+        return queryset
 
     def get_queryset(self):
         """Retrieve the astronomy show with filters"""
         title = self.request.query_params.get("title")
         theme = self.request.query_params.get("theme")
+        text = self.request.query_params.get("q")
         queryset = self.queryset
 
+        if self.action == "retrieve":
+            queryset = queryset.prefetch_related("theme")
+
         if title:
             queryset = queryset.filter(title__icontains=title)
 
+        if text:
+            queryset = self._search(queryset, text)
+
         if theme:
             theme_ids = self._params_to_ints(theme)
-            queryset = queryset.filter(theme__id__in=theme_ids)
-        return queryset.distinct()
+            theme_match = self.request.query_params.get("theme_match", "any")
+            queryset = self._filter_by_themes(queryset, theme_ids, theme_match)
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -132,51 +394,109 @@ class AstronomyShowViewSet(viewsets.ModelViewSet):
                 type=str,
                 description="Filter by title (ex. ?title=Mars)",
             ),
+            OpenApiParameter(
+                name="q",
+                type=str,
+                description="Full-text search in title and description, "
+                "most relevant first (ex. ?q=black holes)",
+            ),
             OpenApiParameter(
                 name="theme",
                 type={"type": "list", "items": {"type": "number"}},
                 description="Filter by theme  (ex: ?theme=1,2)",
             ),
+            OpenApiParameter(
+                name="theme_match",
+                type=str,
+                enum=THEME_MATCH_MODES,
+                description="Shows with any (default) or all of the themes "
+                "(ex: ?theme=1,2&theme_match=all)",
+            ),
+            *CURSOR_PAGINATION_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
 
-class ShowSessionViewSet(viewsets.ModelViewSet):
+class ShowSessionViewSet(
+    ConditionalRetrieveMixin,
+    StaleWhileRevalidateMixin,
+    ValuesListMixin,
+    CursorPaginationMixin,
+    viewsets.ModelViewSet,
+):
     queryset = ShowSession.objects.select_related(
         "astronomy_show", "planetarium_dome"
     )
     serializer_class = ShowSessionSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
     pagination_class = AstroListPagination
+    cursor_ordering = ("-show_time", "-id")
+    values_serializer_class = ShowSessionListValuesSerializer
+    stale_while_revalidate_setting = "SHOW_SESSION_LIST_CACHE"
+    etag_models = (
+        ShowSession,
+        AstronomyShow,
+        AstronomyShow.theme.through,
+        ShowTheme,
+        PlanetariumDome,
+    )
+    etag_context_keys = ("encoding",)
 
     def get_queryset(self):
         queryset = self.queryset
         if self.action == "list":
-            queryset = queryset.select_related(
-                "astronomy_show", "planetarium_dome"
-            ).annotate(
+            queryset = queryset.annotate(
                 tickets_available=(
                     F("planetarium_dome__rows")
                     * F("planetarium_dome__seats_in_row")
-                    - Count("tickets")
+                    - F("tickets_sold")
                 )
             )
 
         date = self.request.query_params.get("show_time")
+        show_time_from = self.request.query_params.get("show_time_from")
+        show_time_to = self.request.query_params.get("show_time_to")
         astronomy_show_id_str = self.request.query_params.get("astronomy_show")
+        planetarium_dome_id_str = self.request.query_params.get(
+            "planetarium_dome"
+        )
 
         if date:
-            date = datetime.strptime(date, "%Y-%m-%d").date()
-            queryset = queryset.filter(show_time__date=date)
+            day_start = _parse_show_time(date, "show_time")
+            queryset = queryset.filter(
+                show_time__gte=day_start,
+                show_time__lt=day_start + timedelta(days=1),
+            )
+
+        if show_time_from:
+            queryset = queryset.filter(
+                show_time__gte=_parse_show_time(
+                    show_time_from, "show_time_from"
+                )
+            )
+
+        if show_time_to:
+            queryset = queryset.filter(
+                show_time__lt=_parse_show_time(show_time_to, "show_time_to")
+            )
 
         if astronomy_show_id_str:
             queryset = queryset.filter(
-                astronomy_show_id=int(astronomy_show_id_str)
+                astronomy_show_id=_parse_id(
+                    astronomy_show_id_str, "astronomy_show"
+                )
             )
 
-        return queryset.distinct()
+        if planetarium_dome_id_str:
+            queryset = queryset.filter(
+                planetarium_dome_id=_parse_id(
+                    planetarium_dome_id_str, "planetarium_dome"
+                )
+            )
+
+        return queryset
 
     @extend_schema(
         parameters=[
@@ -187,36 +507,181 @@ class ShowSessionViewSet(viewsets.ModelViewSet):
                 " show id (ex: ?astronomy_show=2)",
             ),
             OpenApiParameter(
-                name="date",
+                name="planetarium_dome",
+                type=int,
+                description="Filter by planetarium"
+                " dome id (ex: ?planetarium_dome=1)",
+            ),
+            OpenApiParameter(
+                name="show_time",
                 type=OpenApiTypes.DATE,
                 description="Filter by date show session "
-                "(ex: ?date=2023-08-18)",
+                "(ex: ?show_time=2023-08-18)",
             ),
+            OpenApiParameter(
+                name="show_time_from",
+                type=OpenApiTypes.DATETIME,
+                description="Filter show sessions starting at or after "
+                "(ex: ?show_time_from=2023-08-18T12:00)",
+            ),
+            OpenApiParameter(
+                name="show_time_to",
+                type=OpenApiTypes.DATETIME,
+                description="Filter show sessions starting before "
+                "(ex: ?show_time_to=2023-08-25)",
+            ),
+            *CURSOR_PAGINATION_PARAMETERS,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="encoding",
+                type=str,
+                enum=SEAT_MAP_ENCODINGS,
+                description="Seat map encoding: base64 bitmap of "
+                "rows * seats_in_row bits or lengths of alternating "
+                "free and taken runs (ex: ?encoding=rle)",
+            ),
+        ]
+    )
+    @action(methods=["GET"], detail=True, url_path="seat-map")
+    def seat_map(self, request, pk=None):
+        """Endpoint for compact occupancy of specific show session"""
+        return self.conditional_response(self._seat_map, request, pk=pk)
+
+    def _seat_map(self, request, pk=None):
+        show_session = self.get_object()
+        serializer = self.get_serializer(show_session)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        responses={(200, "text/event-stream"): OpenApiTypes.STR},
+    )
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="seat-events",
+        renderer_classes=[ORJSONRenderer, EventStreamRenderer],
+    )
+    def seat_events(self, request, pk=None):
+        """Endpoint streaming seats taken and released in the session.
+
+        Under ASGI the stream stays open on the event loop. Under WSGI
+        it would hold a worker thread, so only the reconnect delay and
+        a reset are sent and the client falls back to polling.
+        """
+        show_session = self.get_object()
+        version = show_session.version
+        last_event_id = request.headers.get("Last-Event-ID")
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if isinstance(request._request, ASGIRequest):
+            return StreamingHttpResponse(
+                seat_event_stream(show_session.pk, version, last_event_id),
+                content_type="text/event-stream",
+                headers=headers,
+            )
+        return HttpResponse(
+            f"retry: {settings.SEAT_EVENTS['RETRY']}\n\n"
+            + format_event("reset", {"version": version}, version),
+            content_type="text/event-stream",
+            headers=headers,
+        )
+
+    def get_etag_annotations(self):
+        if self.action != "seat_map":
+            return {}
+        # Hold ids only grow, so count and maximum of the active holds
+        # change with every hold taken, released or expired
+        active = Q(seat_holds__expires_at__gt=timezone.now())
+        return {
+            "active_holds": Count("seat_holds", filter=active),
+            "last_hold": Max("seat_holds__id", filter=active),
+        }
+
+    @action(methods=["POST"], detail=True)
+    def allocate(self, request, pk=None):
+        """Endpoint for reserving the best adjacent seats for a party"""
+        show_session = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservation = serializer.save(
+            user=request.user, show_session=show_session
+        )
+        prefetch_related_objects(
+            [reservation],
+            Prefetch("tickets", queryset=Ticket.objects.order_by("seat")),
+        )
+        return Response(
+            ReservationSerializer(reservation).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        encoding = self.request.query_params.get("encoding")
+        if encoding in SEAT_MAP_ENCODINGS:
+            context["encoding"] = encoding
+        return context
+
     def get_serializer_class(self):
         if self.action == "list":
             return ShowSessionListSerializer
 
         if self.action == "retrieve":
             return ShowSessionDetailSerializer
+
+        if self.action == "seat_map":
+            return ShowSessionSeatMapSerializer
+
+        if self.action == "allocate":
+            return ShowSessionAllocateSerializer
         return ShowSessionSerializer
 
 
-class ReservationViewSet(viewsets.ModelViewSet):
-    queryset = Reservation.objects.prefetch_related(
-        "tickets__show_session__planetarium_dome",
-        "tickets__show_session__astronomy_show",
+class ReservationViewSet(
+    CursorPaginationMixin,
+    IdempotentCreateMixin,
+    QueuedReservationCreateMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Reservation.objects.select_related("user").prefetch_related(
+        Prefetch(
+            "tickets",
+            queryset=Ticket.objects.select_related(
+                "show_session__planetarium_dome",
+                "show_session__astronomy_show",
+            ),
+        )
     )
     serializer_class = ReservationSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
-    pagination_class = AstroListPagination
+    pagination_class = EstimatedCountPagination
+    cursor_ordering = ("-created_at", "-id")
 
     def get_queryset(self):
-        return Reservation.objects.filter(user=self.request.user)
+        return self.queryset.filter(user=self.request.user)
+
+    @extend_schema(parameters=CURSOR_PAGINATION_PARAMETERS)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name=IDEMPOTENCY_KEY_HEADER,
+                type=str,
+                location=OpenApiParameter.HEADER,
+                description="Unique key of the request: retries with "
+                "the same key get the original response",
+            )
+        ]
+    )
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def get_serializer_class(self):
         if (self.action == "list") | (self.action == "retrieve"):
@@ -227,10 +692,12 @@ class ReservationViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(ValuesListMixin, viewsets.ModelViewSet):
     queryset = Ticket.objects.select_related("show_session", "reservation")
     serializer_class = TicketSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = EstimatedCountPagination
+    values_serializer_class = TicketListValuesSerializer
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -238,3 +705,228 @@ class TicketViewSet(viewsets.ModelViewSet):
         if self.action == "retrieve":
             return TicketListSerializer
         return TicketSerializer
+
+
+class SeatHoldViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.DestroyModelMixin,
+    viewsets.GenericViewSet,
+):
+    queryset = SeatHold.objects.all()
+    serializer_class = SeatHoldSerializer
+    permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    pagination_class = AstroListPagination
+
+    def get_queryset(self):
+        """Retrieve active seat holds of the user"""
+        return self.queryset.active().filter(user=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return SeatHoldCreateSerializer
+        if self.action == "checkout":
+            return SeatHoldCheckoutSerializer
+        return SeatHoldSerializer
+
+    def create(self, request, *args, **kwargs):
+        """Hold seats of the show session for a few minutes"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        holds = serializer.save(user=request.user)
+        return Response(
+            SeatHoldSerializer(holds, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(methods=["POST"], detail=False)
+    def checkout(self, request):
+        """Endpoint for turning active seat holds into a reservation"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reservation = serializer.save(user=request.user)
+        return Response(
+            ReservationSerializer(reservation).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class ReservationRequestViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ReservationRequest.objects.all()
+    serializer_class = ReservationRequestSerializer
+    permission_classes = (IsAuthenticated,)
+    pagination_class = AstroListPagination
+
+    MAX_WAIT_SECONDS = 30
+    POLL_INTERVAL_SECONDS = 0.5
+
+    def get_queryset(self):
+        return self.queryset.filter(user=self.request.user)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="wait",
+                type=int,
+                description="Wait up to this many seconds (at most 30) "
+                "for a pending request to be processed (ex: ?wait=10)",
+            ),
+        ]
+    )
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve the reservation request, long-polling while pending"""
+        reservation_request = self.get_object()
+        try:
+            wait = float(request.query_params.get("wait", 0))
+        except ValueError:
+            wait = 0
+        deadline = time.monotonic() + min(wait, self.MAX_WAIT_SECONDS)
+        while (
+            reservation_request.status == ReservationRequest.Status.PENDING
+            and time.monotonic() < deadline
+        ):
+            time.sleep(self.POLL_INTERVAL_SECONDS)
+            reservation_request.refresh_from_db()
+
+        serializer = self.get_serializer(reservation_request)
+        return Response(serializer.data)
+
+
+class ExportViewSet(viewsets.ViewSet):
+    """Streaming sales exports for staff"""
+
+    permission_classes = (IsAdminUser,)
+
+    def _ticket_filters(self):
+        """Build ticket filters from the query params"""
+        params = self.request.query_params
+        filters = {}
+        for param, lookup, parse in (
+            ("show_session", "show_session_id", _parse_id),
+            ("astronomy_show", "show_session__astronomy_show_id", _parse_id),
+            (
+                "planetarium_dome",
+                "show_session__planetarium_dome_id",
+                _parse_id,
+            ),
+            (
+                "show_time_from",
+                "show_session__show_time__gte",
+                _parse_show_time,
+            ),
+            ("show_time_to", "show_session__show_time__lt", _parse_show_time),
+        ):
+            if params.get(param):
+                filters[lookup] = parse(params[param], param)
+        return filters
+
+    def _export(self, queryset, fields, name):
+        accepted_format = {
+            media_type: export_format
+            for export_format, media_type in EXPORT_FORMATS.items()
+        }.get(self.request.accepted_renderer.media_type, "ndjson")
+        export_format = self.request.query_params.get(
+            "export_format", accepted_format
+        )
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"export_format": f"Use one of: {', '.join(EXPORT_FORMATS)}"}
+            )
+        filename = f"{name}.{export_format}"
+        return StreamingHttpResponse(
+            export_rows(queryset, fields, export_format),
+            content_type=EXPORT_FORMATS[export_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            },
+        )
+
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses=OpenApiTypes.BINARY)
+    @action(
+        methods=["GET"],
+        detail=False,
+        renderer_classes=EXPORT_RENDERER_CLASSES,
+    )
+    def tickets(self, request):
+        """Stream all tickets matching the filters"""
+        queryset = Ticket.objects.filter(**self._ticket_filters()).order_by(
+            "id"
+        )
+        return self._export(queryset, TICKET_EXPORT_FIELDS, "tickets")
+
+    @extend_schema(parameters=EXPORT_PARAMETERS, responses=OpenApiTypes.BINARY)
+    @action(
+        methods=["GET"],
+        detail=False,
+        renderer_classes=EXPORT_RENDERER_CLASSES,
+    )
+    def reservations(self, request):
+        """Stream reservations having tickets that match the filters"""
+        queryset = Reservation.objects.annotate(
+            tickets_count=Count("tickets")
+        ).order_by("id")
+        filters = self._ticket_filters()
+        if filters:
+            queryset = queryset.filter(
+                Exists(
+                    Ticket.objects.filter(
+                        reservation=OuterRef("pk"), **filters
+                    )
+                )
+            )
+        return self._export(
+            queryset, RESERVATION_EXPORT_FIELDS, "reservations"
+        )
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """Request profiles recorded by ProfilerMiddleware in this process"""
+
+    permission_classes = (IsAdminUser,)
+
+    def _get_profile(self, pk):
+        profile = get_profile(_parse_id(pk, "id"))
+        if profile is None:
+            raise NotFound()
+        return profile
+
+    @extend_schema(responses=ProfileSerializer(many=True))
+    def list(self, request):
+        return Response(ProfileSerializer(reversed(profiles), many=True).data)
+
+    @extend_schema(
+        parameters=PROFILE_ID_PARAMETERS,
+        responses=ProfileDetailSerializer,
+    )
+    def retrieve(self, request, pk=None):
+        """Profile with its most sampled stacks"""
+        profile = self._get_profile(pk)
+        return Response(
+            ProfileDetailSerializer(
+                {
+                    **profile,
+                    "top_stacks": [
+                        {"stack": stack.split(";"), "samples": samples}
+                        for stack, samples in profile["stacks"].most_common(
+                            PROFILE_TOP_STACKS
+                        )
+                    ],
+                }
+            ).data
+        )
+
+    @extend_schema(
+        parameters=PROFILE_ID_PARAMETERS, responses=OpenApiTypes.STR
+    )
+    @action(methods=["GET"], detail=True)
+    def flamegraph(self, request, pk=None):
+        """Download the stacks in the folded format of flamegraph.pl"""
+        profile = self._get_profile(pk)
+        return HttpResponse(
+            folded_stacks(profile),
+            content_type="text/plain; charset=utf-8",
+            headers={
+                "Content-Disposition": "attachment; "
+                f'filename="profile-{profile["id"]}.folded"'
+            },
+        )
@@ -44,26 +44,30 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "planetarium",
     "user",
     "rest_framework",
     "drf_spectacular",
-    "debug_toolbar",
 ]
 
 AUTH_USER_MODEL = "user.User"
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "planetarium.profiling.ProfilerMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(1, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
 ROOT_URLCONF = "planetarium_services.urls"
 
 TEMPLATES = [
@@ -149,10 +153,23 @@ REST_FRAMEWORK = {
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
-    "DEFAULT_THROTTLE_RATES": {"anon": "50/day", "user": "100/day"},
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": "50/day",
+        "user": "100/day",
+        "suggest": "5000/day",
+    },
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "planetarium.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "planetarium.renderers.ORJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 SPECTACULAR_SETTINGS = {
@@ -168,6 +185,64 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+SEAT_HOLD_MINUTES = 10
+SEAT_HOLD_MAX_MINUTES = 30
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+# Version stamps of cached data live in the default cache, use a shared
+# backend (file, memcached, redis) when running several processes.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "planetarium"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "responses": {
+        "BACKEND": os.environ.get(
+            "RESPONSE_CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get(
+            "RESPONSE_CACHE_LOCATION", "planetarium-responses"
+        ),
+        "TIMEOUT": 600,
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    },
+}
+RESPONSE_CACHE_ALIAS = "responses"
+
+# Seconds; tickets_available of the show session list may be SOFT_TTL old
+SHOW_SESSION_LIST_CACHE = {
+    "SOFT_TTL": 5,
+    "HARD_TTL": 300,
+    "LOCK_TIMEOUT": 10,
+    "BACKGROUND_REFRESH": True,
+}
+
+# Server-sent seat events; the cache backend shares them between workers
+SEAT_EVENTS = {
+    "BACKEND": os.environ.get(
+        "SEAT_EVENTS_BACKEND", "planetarium.seat_events.InProcessBroker"
+    ),
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT": 15,
+    "MAX_AGE": 300,
+    "RETRY": 3000,
+    "POLL_INTERVAL": 0.5,
+    "MESSAGE_TIMEOUT": 60,
+}
+
+# Async read views under /api/planetarium/async/, for ASGI deployments
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "") == "True"
+
+PROFILER_HEADER = "X-Profile"
+PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", 0))
+PROFILER_BUFFER_SIZE = 50
+PROFILER_INTERVAL = 0.005
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),